@@ -3,13 +3,19 @@
 # ==========================
 # 📦 INSTALL DEPENDENCIES
 # ==========================
+import hashlib
+import json
 import logging
 import os
+import secrets
+import shutil
 import subprocess
 import time
+import uuid
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from urllib.parse import urlparse
-from IPython.display import clear_output
+from IPython.display import Pretty, clear_output, display
 
 
 def log(message, level="INFO"):
@@ -45,17 +51,46 @@ install_aria2()
 # ⚙️ INPUT CONFIGURATION
 # ==========================
 download_url = ""  # @param {type:"string"}
+mirror_urls = ""  # @param {type:"string"}
 filename = ""  # @param {type:"string"}
 output_dir = "/content/downloads"  # @param {type:"string"}
 aria2_parallel_conn = 10  # @param {type:"integer"}
 retry_count = 3  # @param {type:"integer", min:1, max:10}
 timeout = 600  # @param {type:"integer", min:60, max:3600}
+resume_downloads = True  # @param {type:"boolean"}
+# @markdown Checksum: `sha256:<hex>` (or bare hex); `auto` also looks for `<url>.sha256`
+expected_checksum = ""  # @param {type:"string"}
+checksum_mode = "auto"  # @param ["off", "auto", "always"]
+metrics_dir = "/content/media_toolkit/metrics"  # @param {type:"string"}
+# @markdown Adaptive tuning: saved host profiles are only read and updated while this is on.
+# @markdown Tuning runs on single RPC downloads only; CLI and batch downloads just reuse the profiles
+adaptive_tuning = False  # @param {type:"boolean"}
+host_profile_path = (
+    "/content/media_toolkit/config/aria2_host_profiles.json"  # @param {type:"string"}
+)
+engine = "rpc"  # @param ["rpc", "cli"]
+max_concurrent_downloads = 4  # @param {type:"integer", min:1, max:16}
+max_overall_download_limit = "0"  # @param {type:"string"}
+rpc_port = 6800  # @param {type:"integer"}
+keep_rpc_daemon = True  # @param {type:"boolean"}
+# @markdown Batch mode: URLs separated by spaces, or a text file with one `URL | filename` per line
+url_list = ""  # @param {type:"string"}
+url_list_file = ""  # @param {type:"string"}
+max_connections_per_host = 16  # @param {type:"integer", min:1, max:64}
+# @markdown Post-processing per finished file, comma separated: `ffprobe`, `split`, `drive`
+post_process_steps = ""  # @param {type:"string"}
+post_process_workers = 2  # @param {type:"integer", min:1, max:8}
+metadata_folder = "/content/media_toolkit/metadata"  # @param {type:"string"}
+split_target_mb = 1900  # @param {type:"integer", min:50}
+drive_target_folder = "/content/drive/MyDrive/downloads"  # @param {type:"string"}
 
 # ==========================
 # 🧠 HELPER FUNCTIONS
 # ==========================
 import re
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 
 def sanitize_filename(name: str, max_length: int = 255) -> str:
@@ -68,24 +103,18 @@ def sanitize_filename(name: str, max_length: int = 255) -> str:
     return name.strip()
 
 
-def get_output_filename(url: str, fallback_name: str) -> str:
+def get_output_filename(url: str, fallback_name: str, probe: dict = None) -> str:
     # 1️⃣ Prioritas pertama: filename dari parameter user
     if fallback_name.strip():
         return sanitize_filename(fallback_name.strip())
 
-    # 2️⃣ Coba ambil dari Content-Disposition header
-    try:
-        head_resp = requests.head(url, allow_redirects=True, timeout=10)
-        if "Content-Disposition" in head_resp.headers:
-            cd = head_resp.headers["Content-Disposition"]
-            fname_match = re.findall('filename="?([^"]+)"?', cd)
-            if fname_match:
-                return sanitize_filename(fname_match[0])
-    except Exception as e:
-        log(f"Could not fetch filename from header: {e}", "WARNING")
+    # 2️⃣ Ambil dari Content-Disposition hasil probe
+    if probe and probe.get("filename"):
+        return sanitize_filename(probe["filename"])
 
-    # 3️⃣ Ambil dari URL path
-    basename = os.path.basename(urlparse(url).path)
+    # 3️⃣ Ambil dari URL path (setelah redirect jika ada)
+    final_url = probe.get("final_url") if probe else None
+    basename = os.path.basename(urlparse(final_url or url).path)
     if basename:
         return sanitize_filename(basename)
 
@@ -119,6 +148,17 @@ def print_download_summary(
     print(f"╰⏱️ Timeout     : {timeout} seconds\n")
 
 
+def print_probe_summary(probe: dict):
+    size = probe["content_length"]
+    ranges = {True: "Yes", False: "No", None: "Unknown"}[probe["accept_ranges"]]
+    print(
+        f"╭📦 Remote Size : {f'{size / (1024 * 1024):.2f} MB' if size else 'Unknown'}"
+    )
+    print(f"├✂️ Ranges      : {ranges}")
+    print(f"├🏷️ ETag        : {probe['etag'] or '-'}")
+    print(f"╰🔀 Final URL   : {probe['final_url']}\n")
+
+
 def print_download_result(
     final_filename: str, download_url: str, output_path: str, elapsed: float
 ):
@@ -134,11 +174,22 @@ def print_download_result(
         print(f"ℹ️ Reason: File not found after download")
 
 
-def verify_downloaded_file(file_path: str, min_size_kb: int = 100):
+def verify_downloaded_file(
+    file_path: str, min_size_kb: int = 100, expected_size: int = None
+):
     if not os.path.exists(file_path):
         return False
     try:
         file_size = os.path.getsize(file_path)
+        if expected_size:
+            if file_size != expected_size:
+                log(
+                    f"Size mismatch: {file_size} bytes on disk,"
+                    f" server reported {expected_size}",
+                    "WARNING",
+                )
+                return False
+            return True
         if file_size < min_size_kb * 1024:
             log(f"File too small ({file_size} bytes), possibly corrupted", "WARNING")
             os.remove(file_path)
@@ -165,7 +216,199 @@ def cleanup_resources(process, output_path: str = None):
         log(f"Cleanup warning: {str(e)}", "WARNING")
 
 
-def display_download_progress(process):
+# ==========================
+# 🔎 URL PROBE
+# ==========================
+FALLOC_THRESHOLD = 256 * 1024 * 1024
+
+
+def create_http_session(pool_size: int = 16) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def probe_url(session: requests.Session, url: str) -> dict:
+    """
+    One ranged GET (bytes=0-0) that reads filename, size, range support,
+    ETag and the final redirect target.
+    """
+    probe = {
+        "url": url,
+        "final_url": url,
+        "filename": None,
+        "content_length": None,
+        "accept_ranges": None,
+        "etag": None,
+        "last_modified": None,
+        "ok": False,
+    }
+    try:
+        resp = session.get(
+            url,
+            headers={"Range": "bytes=0-0"},
+            allow_redirects=True,
+            stream=True,
+            timeout=10,
+        )
+        resp.close()
+    except Exception as e:
+        log(f"Could not probe {url}: {e}", "WARNING")
+        return probe
+    if resp.status_code >= 400:
+        log(f"Probe returned HTTP {resp.status_code} for {url}", "WARNING")
+        return probe
+
+    headers = resp.headers
+    probe["ok"] = True
+    probe["final_url"] = resp.url
+    probe["etag"] = headers.get("ETag")
+    probe["last_modified"] = headers.get("Last-Modified")
+    fname_match = re.findall(
+        'filename="?([^";]+)"?', headers.get("Content-Disposition", "")
+    )
+    if fname_match:
+        probe["filename"] = fname_match[0]
+
+    if resp.status_code == 206:
+        probe["accept_ranges"] = True
+        total = headers.get("Content-Range", "").rpartition("/")[2]
+        probe["content_length"] = int(total) if total.isdigit() else None
+    else:
+        # Server mengabaikan Range dan mengirim seluruh isi file
+        probe["accept_ranges"] = False
+        length = headers.get("Content-Length", "")
+        probe["content_length"] = int(length) if length.isdigit() else None
+    return probe
+
+
+def probe_urls(session: requests.Session, urls: list, workers: int = 8) -> list:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda url: probe_url(session, url), urls))
+
+
+def resolve_mirrors(session: requests.Session, probe: dict, mirrors: list) -> list:
+    """
+    Probe extra mirrors of the same file and keep only the usable ones:
+    reachable, same size as the primary and able to serve ranges.
+    """
+    if not mirrors:
+        return []
+    candidates = [probe] + probe_urls(session, mirrors)
+    reference = next(
+        (p["content_length"] for p in candidates if p["ok"] and p["content_length"]),
+        None,
+    )
+    alive = []
+    for candidate in candidates:
+        if not candidate["ok"]:
+            reason = "unreachable"
+        elif reference and candidate["content_length"] not in (None, reference):
+            reason = f"size {candidate['content_length']} != {reference}"
+        elif candidate["accept_ranges"] is False:
+            reason = "no range support"
+        else:
+            alive.append(candidate["final_url"])
+            continue
+        log(f"Dropping mirror {candidate['url']} ({reason})", "WARNING")
+    log(f"Using {len(alive)}/{len(candidates)} mirror(s)")
+    return alive
+
+
+def plan_from_probe(url: str, connections: int, probe: dict = None) -> tuple:
+    """Return (uri, connections, file_allocation) for aria2 based on a probe"""
+    if not probe:
+        return url, connections, "none"
+    if probe["accept_ranges"] is False and connections > 1:
+        log("Server does not support range requests, using 1 connection", "WARNING")
+        connections = 1
+    size = probe["content_length"] or 0
+    allocation = "falloc" if size >= FALLOC_THRESHOLD else "none"
+    return probe["final_url"] or url, connections, allocation
+
+
+# ==========================
+# ⏯️ RESUME SUPPORT
+# ==========================
+def resume_state_path(output_path: str) -> str:
+    return output_path + ".resume.json"
+
+
+def discard_partial(output_path: str):
+    for path in (output_path, output_path + ".aria2", resume_state_path(output_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def prepare_resume(url: str, output_path: str, probe: dict) -> str:
+    """
+    Decide what to do with an existing partial download.
+    Returns "fresh", "resume" or "complete".
+    """
+    control_path = output_path + ".aria2"
+    has_partial = os.path.exists(output_path) or os.path.exists(control_path)
+
+    remote = None
+    if probe and probe["content_length"] is not None:
+        remote = {
+            "url": url,
+            "content_length": probe["content_length"],
+            "etag": probe["etag"],
+            "last_modified": probe["last_modified"],
+        }
+
+    state = None
+    if os.path.exists(resume_state_path(output_path)):
+        try:
+            with open(resume_state_path(output_path), "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+
+    verdict = "fresh"
+    size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+    if has_partial and remote:
+        reason = None
+        if state is None:
+            pass
+        elif remote["content_length"] != state.get("content_length"):
+            reason = "Content-Length changed"
+        elif remote["etag"] and state.get("etag") and remote["etag"] != state["etag"]:
+            reason = "ETag changed"
+
+        # File remote berubah: cek ini dulu sebelum menganggap file lengkap
+        if reason:
+            log(f"Discarding partial download ({reason})", "WARNING")
+            discard_partial(output_path)
+        elif not os.path.exists(control_path) and size == remote["content_length"]:
+            verdict = "complete"
+        elif state is None:
+            log("Discarding partial download (no resume record)", "WARNING")
+            discard_partial(output_path)
+        else:
+            verdict = "resume"
+            if os.path.exists(control_path):
+                log("Resuming partial download from aria2 control file")
+            else:
+                log(f"Resuming from {size / (1024 * 1024):.2f} MB on disk")
+    elif has_partial:
+        # Server tidak bisa divalidasi, biarkan aria2 yang memutuskan
+        verdict = "resume"
+
+    if remote and verdict != "complete":
+        with open(resume_state_path(output_path), "w") as f:
+            json.dump(remote, f, indent=2)
+    return verdict
+
+
+def finish_resume(output_path: str):
+    if os.path.exists(resume_state_path(output_path)):
+        os.remove(resume_state_path(output_path))
+
+
+def display_download_progress(process, telemetry=None):
     while True:
         output = process.stdout.readline()
         if output == "" and process.poll() is not None:
@@ -173,8 +416,10 @@ def display_download_progress(process):
         if output:
             line = output.strip()
             if line.startswith("[#"):
-                # print(line, flush=True)
-                log(f"{line}", "DOWNLOAD")
+                sample = parse_summary_line(line)
+                if telemetry and sample:
+                    telemetry.record(sample)
+                    telemetry.render(format_sample(sample))
             elif "error" in line.lower():
                 log(f"{line}", "ERROR")
             elif "warn" in line.lower():
@@ -189,22 +434,28 @@ def display_download_progress(process):
 
 
 def run_download_process(
-    download_url: str,
+    download_url,
     output_dir: str,
     final_filename: str,
     aria2_parallel_conn: int,
     retry_count: int,
     timeout: int,
+    resume: bool = False,
+    split_size: str = "1M",
+    file_allocation: str = "none",
+    checksum: str = None,
 ):
+    # Beberapa URI untuk satu file = mirror, aria2 membagi segmen di antaranya
+    uris = [download_url] if isinstance(download_url, str) else list(download_url)
     cmd = [
         "aria2c",
-        download_url,
+        *uris,
         "-x",
         str(aria2_parallel_conn),
         "-s",
-        str(aria2_parallel_conn),
+        str(aria2_parallel_conn * len(uris)),
         "-k",
-        "1M",
+        split_size,
         "-d",
         output_dir,
         "-o",
@@ -213,10 +464,17 @@ def run_download_process(
         "--timeout=" + str(timeout),
         "--summary-interval=1",
         "--console-log-level=warn",
-        "--file-allocation=none",
+        f"--file-allocation={file_allocation}",
         "--auto-file-renaming=false",
-        "--allow-overwrite=true",
     ]
+    if resume:
+        cmd += ["--continue=true", "--allow-overwrite=false", "--auto-save-interval=15"]
+    else:
+        cmd += ["--allow-overwrite=true"]
+    if checksum:
+        cmd += [f"--checksum={checksum}", "--check-integrity=true"]
+    if len(uris) > 1:
+        cmd += ["--uri-selector=adaptive"]
 
     try:
         log("Starting download with aria2c...")
@@ -234,21 +492,971 @@ def run_download_process(
         raise RuntimeError("Download process initialization failed")
 
 
+# ==========================
+# 🛰️ ARIA2 JSON-RPC MANAGER
+# ==========================
+class Aria2RPCError(RuntimeError):
+    pass
+
+
+class Aria2Manager:
+    """Run one long-lived aria2c daemon and drive it through JSON-RPC"""
+
+    STATUS_KEYS = [
+        "gid",
+        "status",
+        "totalLength",
+        "completedLength",
+        "downloadSpeed",
+        "connections",
+        "errorCode",
+        "errorMessage",
+        "files",
+    ]
+
+    def __init__(
+        self,
+        download_dir: str,
+        port: int = 6800,
+        max_concurrent: int = 4,
+        max_overall_limit: str = "0",
+        secret: str = None,
+        host: str = "127.0.0.1",
+    ):
+        self.download_dir = download_dir
+        self.port = port
+        self.max_concurrent = max_concurrent
+        self.max_overall_limit = max_overall_limit or "0"
+        # Secret disimpan di env agar daemon bisa dipakai ulang saat cell dijalankan lagi
+        self.secret = secret or os.environ.setdefault(
+            "ARIA2_RPC_SECRET", secrets.token_hex(16)
+        )
+        self.endpoint = f"http://{host}:{port}/jsonrpc"
+        self.session = requests.Session()
+        self.process = None
+
+    def call(self, method: str, *params):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": uuid.uuid4().hex,
+            "method": method,
+            "params": [f"token:{self.secret}", *params],
+        }
+        resp = self.session.post(self.endpoint, data=json.dumps(payload), timeout=10)
+        data = resp.json()
+        if "error" in data:
+            raise Aria2RPCError(f"{method}: {data['error'].get('message')}")
+        return data["result"]
+
+    def is_alive(self) -> bool:
+        try:
+            self.call("aria2.getVersion")
+            return True
+        except Exception:
+            return False
+
+    def global_options(self) -> dict:
+        return {
+            "max-concurrent-downloads": str(self.max_concurrent),
+            "max-overall-download-limit": str(self.max_overall_limit),
+        }
+
+    def start(self, startup_timeout: int = 15):
+        if self.is_alive():
+            log(f"Reusing aria2 RPC daemon on port {self.port}")
+            self.call("aria2.changeGlobalOption", self.global_options())
+            return self
+
+        os.makedirs(self.download_dir, exist_ok=True)
+        cmd = [
+            "aria2c",
+            "--enable-rpc",
+            "--rpc-listen-all=false",
+            f"--rpc-listen-port={self.port}",
+            f"--rpc-secret={self.secret}",
+            f"--max-concurrent-downloads={self.max_concurrent}",
+            f"--max-overall-download-limit={self.max_overall_limit}",
+            "-d",
+            self.download_dir,
+            "--console-log-level=warn",
+            "--summary-interval=0",
+            "--file-allocation=none",
+            "--auto-file-renaming=false",
+            "--allow-overwrite=true",
+        ]
+        log(f"Starting aria2 RPC daemon on port {self.port}...")
+        self.process = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+
+        deadline = time.time() + startup_timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                stderr_output = self.process.stderr.read().strip()
+                raise RuntimeError(f"aria2 RPC daemon exited early: {stderr_output}")
+            if self.is_alive():
+                log("aria2 RPC daemon is ready")
+                return self
+            time.sleep(0.3)
+
+        self.shutdown()
+        raise RuntimeError("aria2 RPC daemon did not respond in time")
+
+    def add_uri(self, uris, options: dict = None) -> str:
+        if isinstance(uris, str):
+            uris = [uris]
+        options = {k: str(v) for k, v in (options or {}).items()}
+        return self.call("aria2.addUri", uris, options)
+
+    def tell_status(self, gid: str) -> dict:
+        return self.call("aria2.tellStatus", gid, self.STATUS_KEYS)
+
+    def remove(self, gid: str):
+        try:
+            self.call("aria2.forceRemove", gid)
+        except Aria2RPCError:
+            pass
+        try:
+            self.call("aria2.removeDownloadResult", gid)
+        except Aria2RPCError:
+            pass
+
+    def shutdown(self):
+        try:
+            self.call("aria2.shutdown")
+        except Exception:
+            pass
+        if self.process:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.terminate()
+            if self.process.stderr:
+                self.process.stderr.close()
+            self.process = None
+        self.session.close()
+
+
+def format_bytes(num_bytes: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if num_bytes < 1024:
+            return f"{num_bytes:.2f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.2f} TB"
+
+
+def format_eta(seconds) -> str:
+    if seconds is None:
+        return "--:--"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{secs:02}" if hours else f"{minutes:02}:{secs:02}"
+
+
+# aria2 exit status 32: checksum validation failed
+CHECKSUM_ERROR_CODE = "32"
+
+
+def parse_rpc_status(status: dict) -> dict:
+    total = int(status.get("totalLength", 0))
+    done = int(status.get("completedLength", 0))
+    speed = int(status.get("downloadSpeed", 0))
+    eta = (total - done) / speed if speed and total else None
+    error = None
+    if status.get("status") == "error":
+        error = status.get("errorMessage") or f"aria2 error {status.get('errorCode')}"
+        if status.get("errorCode") == CHECKSUM_ERROR_CODE:
+            error = "Checksum validation failed"
+    return {
+        "gid": status.get("gid"),
+        "status": status.get("status"),
+        "total": total,
+        "done": done,
+        "speed": speed,
+        "connections": int(status.get("connections", 0)),
+        "eta": eta,
+        "percent": done * 100 / total if total else 0.0,
+        "error": error,
+        "error_code": status.get("errorCode"),
+    }
+
+
+def build_rpc_options(
+    output_dir: str,
+    final_filename: str,
+    aria2_parallel_conn: int,
+    retry_count: int,
+    timeout: int,
+    resume: bool = False,
+    split_size: str = "1M",
+    file_allocation: str = "none",
+    checksum: str = None,
+    mirror_count: int = 1,
+) -> dict:
+    options = {
+        "dir": output_dir,
+        "out": final_filename,
+        "split": aria2_parallel_conn,
+        "max-connection-per-server": aria2_parallel_conn,
+        "min-split-size": split_size,
+        "file-allocation": file_allocation,
+        "max-tries": retry_count,
+        "timeout": timeout,
+    }
+    if resume:
+        options.update(
+            {"continue": "true", "allow-overwrite": "false", "auto-save-interval": 15}
+        )
+    if checksum:
+        options.update({"checksum": checksum, "check-integrity": "true"})
+    if mirror_count > 1:
+        # adaptive: pilih mirror tercepat berdasarkan statistik kecepatan server
+        options.update(
+            {"split": aria2_parallel_conn * mirror_count, "uri-selector": "adaptive"}
+        )
+    return options
+
+
+def stalled_seconds(progress: dict, gid: str, info: dict) -> float:
+    """Seconds since completedLength of `gid` last changed; 0 while waiting or paused"""
+    now = time.time()
+    last = progress.get(gid)
+    # changeOption (tuner) bisa me-restart koneksi: perubahan apa pun dihitung progres
+    if info["status"] != "active" or last is None or info["done"] != last[0]:
+        progress[gid] = (info["done"], now)
+        return 0.0
+    return now - last[1]
+
+
+def wait_for_rpc_downloads(
+    manager: Aria2Manager,
+    gids: list,
+    stall_timeout: int = None,
+    telemetry=None,
+    tuner=None,
+):
+    """Poll tellStatus until every gid reaches a final state"""
+    final_states = ("complete", "error", "removed")
+    results = {}
+    # Hanya macet yang dihentikan: file besar yang terus maju boleh berjalan lama
+    progress = {}
+
+    while len(results) < len(gids):
+        stalled = 0.0
+        for gid in gids:
+            if gid in results:
+                continue
+            info = parse_rpc_status(manager.tell_status(gid))
+            if info["status"] in final_states:
+                results[gid] = info
+                if info["error"]:
+                    log(f"[{gid}] {info['error']}", "ERROR")
+                continue
+            stalled = max(stalled, stalled_seconds(progress, gid, info))
+            if tuner and gid == tuner.gid:
+                tuner.observe(info)
+            if info["status"] == "active" and telemetry:
+                sample = sample_from_rpc(info)
+                telemetry.record(sample)
+                telemetry.render(format_sample(sample))
+
+        if stall_timeout and stalled > stall_timeout:
+            for gid in gids:
+                if gid not in results:
+                    manager.remove(gid)
+            raise TimeoutError(f"No progress for {stall_timeout} seconds")
+        if len(results) < len(gids):
+            time.sleep(1)
+
+    return results
+
+
+# ==========================
+# 📈 PROGRESS TELEMETRY
+# ==========================
+SIZE_UNITS = {"B": 1, "KiB": 1024, "MiB": 1024**2, "GiB": 1024**3, "TiB": 1024**4}
+SUMMARY_LINE_RE = re.compile(
+    r"\[#(?P<gid>\w+)\s+(?P<done>[\d.]+\w*B)/(?P<total>[\d.]+\w*B)"
+    r"(?:\((?P<percent>\d+)%\))?.*?CN:(?P<cn>\d+).*?DL:(?P<speed>[\d.]+\w*B)"
+    r"(?:.*?ETA:(?P<eta>\w+))?"
+)
+
+
+@dataclass
+class ProgressSample:
+    timestamp: float
+    gid: str
+    done: int
+    total: int
+    speed: int
+    connections: int
+    eta: int = None
+    label: str = ""
+
+
+def parse_size(text: str) -> int:
+    match = re.match(r"([\d.]+)(\w*B)", text)
+    if not match:
+        return 0
+    return int(float(match.group(1)) * SIZE_UNITS.get(match.group(2), 1))
+
+
+def parse_eta(text: str):
+    if not text:
+        return None
+    parts = re.findall(r"(\d+)([hms])", text)
+    if not parts:
+        return None
+    factors = {"h": 3600, "m": 60, "s": 1}
+    return sum(int(value) * factors[unit] for value, unit in parts)
+
+
+def parse_summary_line(line: str):
+    """Turn an aria2c `[#gid done/total(%) CN:.. DL:.. ETA:..]` line into a sample"""
+    match = SUMMARY_LINE_RE.search(line)
+    if not match:
+        return None
+    return ProgressSample(
+        timestamp=time.time(),
+        gid=match.group("gid"),
+        done=parse_size(match.group("done")),
+        total=parse_size(match.group("total")),
+        speed=parse_size(match.group("speed")),
+        connections=int(match.group("cn")),
+        eta=parse_eta(match.group("eta")),
+    )
+
+
+def sample_from_rpc(info: dict, label: str = "") -> ProgressSample:
+    return ProgressSample(
+        timestamp=time.time(),
+        gid=info["gid"],
+        done=info["done"],
+        total=info["total"],
+        speed=info["speed"],
+        connections=info["connections"],
+        eta=int(info["eta"]) if info["eta"] is not None else None,
+        label=label,
+    )
+
+
+def format_sample(sample: ProgressSample) -> str:
+    percent = sample.done * 100 / sample.total if sample.total else 0
+    return (
+        f"📥 {format_bytes(sample.done)}/{format_bytes(sample.total)} ({percent:.1f}%)"
+        f" | ⚡ {format_bytes(sample.speed)}/s | 🔗 {sample.connections}"
+        f" | ⏳ {format_eta(sample.eta)}"
+    )
+
+
+def metrics_file_path(metrics_dir: str, name: str):
+    if not metrics_dir:
+        return None
+    os.makedirs(metrics_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(metrics_dir, f"{name}_{stamp}.metrics.jsonl")
+
+
+class ProgressTelemetry:
+    """Write samples as JSONL and keep a single in-place progress line"""
+
+    def __init__(self, metrics_path: str = None, track_gid: str = None):
+        self.metrics_path = metrics_path
+        self.track_gid = track_gid
+        self.timeline = []
+        self.started = time.time()
+        self.handle = None
+        self.metrics_file = open(metrics_path, "a") if metrics_path else None
+
+    def record(self, sample: ProgressSample):
+        if self.metrics_file:
+            self.metrics_file.write(json.dumps(asdict(sample)) + "\n")
+            self.metrics_file.flush()
+        if self.track_gid is None or sample.gid == self.track_gid:
+            self.timeline.append((sample.timestamp - self.started, sample.speed))
+
+    def render(self, text: str):
+        if self.handle is None:
+            self.handle = display(Pretty(text), display_id=True)
+        else:
+            self.handle.update(Pretty(text))
+
+    def close(self):
+        if self.metrics_file:
+            self.metrics_file.close()
+            self.metrics_file = None
+
+    def print_summary(self, buckets: int = 10):
+        self.close()
+        if not self.timeline:
+            return
+        speeds = [speed for _, speed in self.timeline]
+        print("\n📈 Transfer Telemetry")
+        print(f"╭⏱️ Duration   : {self.timeline[-1][0]:.1f} seconds")
+        print(f"├⚡ Avg Speed  : {format_bytes(sum(speeds) / len(speeds))}/s")
+        print(f"├🚀 Peak Speed : {format_bytes(max(speeds))}/s")
+        print(f"├🐢 Min Speed  : {format_bytes(min(speeds))}/s")
+        print(f"├🧮 Samples    : {len(speeds)}")
+        if self.metrics_path:
+            print(f"├📄 Metrics    : {self.metrics_path}")
+        print("╰📊 Speed over time:")
+
+        # Bagi sampel menjadi beberapa jendela berurutan dengan jumlah sampel sama
+        size = -(-len(self.timeline) // buckets)
+        windows = [
+            self.timeline[i : i + size] for i in range(0, len(self.timeline), size)
+        ]
+        averages = [sum(speed for _, speed in w) / len(w) for w in windows]
+        peak = max(averages) or 1
+        for window, avg in zip(windows, averages):
+            bar = "█" * int(avg / peak * 30)
+            print(
+                f"   {window[0][0]:>7.1f}s - {window[-1][0]:>7.1f}s {bar:<30}"
+                f" {format_bytes(avg)}/s"
+            )
+
+
+# ==========================
+# 🎛️ ADAPTIVE HOST TUNING
+# ==========================
+# (connections, min split size) dari sedikit koneksi besar ke banyak koneksi kecil
+TUNING_LADDER = [(1, "16M"), (2, "8M"), (4, "4M"), (8, "2M"), (16, "1M")]
+
+
+def load_host_profiles(path: str) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log(f"Could not read host profiles: {e}", "WARNING")
+        return {}
+
+
+def save_host_profile(path: str, host: str, profile: dict):
+    profiles = load_host_profiles(path)
+    profiles[host] = profile
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(profiles, f, indent=2)
+
+
+def resolve_host_settings(
+    url: str, aria2_parallel_conn: int, profile_path: str = None
+) -> tuple:
+    """Return (connections, split_size) from a saved host profile or the defaults"""
+    host = urlparse(url).hostname or ""
+    profile = load_host_profiles(profile_path).get(host)
+    if profile:
+        log(
+            f"Using tuned profile for {host}: {profile['connections']} connections,"
+            f" {profile['split_size']} split"
+        )
+        return profile["connections"], profile["split_size"]
+    return aria2_parallel_conn, "1M"
+
+
+def nearest_ladder_index(connections: int) -> int:
+    return min(
+        range(len(TUNING_LADDER)),
+        key=lambda i: abs(TUNING_LADDER[i][0] - connections),
+    )
+
+
+class AdaptiveTuner:
+    """Hill-climb connections and split size on a live download by measured throughput"""
+
+    def __init__(
+        self,
+        manager: Aria2Manager,
+        gid: str,
+        url: str,
+        start_connections: int,
+        profile_path: str = None,
+        mirror_count: int = 1,
+        window: float = 4.0,
+        settle: float = 1.5,
+        min_gain: float = 0.1,
+    ):
+        self.manager = manager
+        self.gid = gid
+        self.host = urlparse(url).hostname or ""
+        self.profile_path = profile_path
+        self.mirror_count = max(1, mirror_count)
+        self.window = window
+        self.settle = settle
+        self.min_gain = min_gain
+        self.index = nearest_ladder_index(start_connections)
+        self.best_index = self.index
+        self.direction = 1
+        self.trials = {}
+        self.speeds = []
+        self.window_start = time.time()
+        self.done = False
+
+    def observe(self, info: dict):
+        if self.done or info["status"] != "active":
+            return
+        elapsed = time.time() - self.window_start
+        if elapsed < self.settle:
+            return
+        self.speeds.append(info["speed"])
+        if elapsed < self.settle + self.window:
+            return
+
+        measured = sum(self.speeds) / len(self.speeds)
+        self.trials[self.index] = measured
+        best_speed = self.trials.get(self.best_index, 0)
+        if self.index == self.best_index or measured > best_speed * (1 + self.min_gain):
+            self.best_index = self.index
+        connections, split_size = TUNING_LADDER[self.index]
+        log(
+            f"Tuning {self.host}: {connections} conn / {split_size}"
+            f" -> {format_bytes(measured)}/s"
+        )
+
+        next_index = self.next_index()
+        if next_index is None:
+            self.done = True
+            if self.index != self.best_index:
+                self.apply(self.best_index)
+            self.save()
+        else:
+            self.apply(next_index)
+
+    def next_index(self):
+        for direction in (self.direction, -self.direction):
+            candidate = self.best_index + direction
+            if 0 <= candidate < len(TUNING_LADDER) and candidate not in self.trials:
+                self.direction = direction
+                return candidate
+        return None
+
+    def apply(self, index: int):
+        connections, split_size = TUNING_LADDER[index]
+        try:
+            # aria2 me-restart download aktif secara internal, progres tetap dari control file
+            self.manager.call(
+                "aria2.changeOption",
+                self.gid,
+                {
+                    "max-connection-per-server": str(connections),
+                    # Split tetap dikali jumlah mirror seperti build_rpc_options
+                    "split": str(connections * self.mirror_count),
+                    "min-split-size": split_size,
+                },
+            )
+        except Aria2RPCError as e:
+            log(f"Could not change connection settings: {e}", "WARNING")
+            self.done = True
+            return
+        self.index = index
+        self.speeds = []
+        self.window_start = time.time()
+
+    def save(self):
+        # Satu percobaan saja belum membandingkan apa pun, jangan timpa profil lama
+        if len(self.trials) < 2 or not self.profile_path:
+            return
+        connections, split_size = TUNING_LADDER[self.best_index]
+        save_host_profile(
+            self.profile_path,
+            self.host,
+            {
+                "connections": connections,
+                "split_size": split_size,
+                "throughput": int(self.trials[self.best_index]),
+                "updated": datetime.now().isoformat(timespec="seconds"),
+            },
+        )
+        log(
+            f"Saved tuned profile for {self.host}: {connections} connections,"
+            f" {split_size} split"
+        )
+
+    def finish(self):
+        if not self.done:
+            self.done = True
+            self.save()
+
+
+# ==========================
+# 🔐 INTEGRITY CHECK
+# ==========================
+# nama algoritma -> (nama hashlib, nama untuk --checksum aria2, panjang hex)
+HASH_ALGOS = {
+    "md5": ("md5", "md5", 32),
+    "sha1": ("sha1", "sha-1", 40),
+    "sha256": ("sha256", "sha-256", 64),
+    "sha512": ("sha512", "sha-512", 128),
+}
+
+
+def parse_checksum(text: str):
+    """Parse `algo:hex`, `algo=hex` or a bare hex digest into (algo, hex)"""
+    text = (text or "").strip().lower().replace("sha-", "sha")
+    if not text:
+        return None
+    algo, sep, digest = text.replace("=", ":").partition(":")
+    if not sep:
+        digest = algo
+        algo = next(
+            (name for name, spec in HASH_ALGOS.items() if spec[2] == len(digest)),
+            None,
+        )
+    if algo not in HASH_ALGOS or not re.fullmatch(r"[0-9a-f]+", digest):
+        log(f"Unrecognised checksum: {text}", "WARNING")
+        return None
+    if len(digest) != HASH_ALGOS[algo][2]:
+        log(f"Checksum has the wrong length for {algo}", "WARNING")
+        return None
+    return algo, digest
+
+
+def aria2_checksum(expected) -> str:
+    if not expected:
+        return None
+    return f"{HASH_ALGOS[expected[0]][1]}={expected[1]}"
+
+
+def fetch_remote_checksum(session: requests.Session, url: str, filename: str):
+    """Look for a `<url>.sha256` sidecar in sha256sum format"""
+    sidecar_url = url.split("?")[0] + ".sha256"
+    try:
+        resp = session.get(sidecar_url, timeout=10)
+    except Exception:
+        return None
+    if resp.status_code != 200 or len(resp.content) > 64 * 1024:
+        return None
+    for line in resp.text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        name = parts[-1].lstrip("*") if len(parts) > 1 else filename
+        if name == filename or len(parts) == 1:
+            expected = parse_checksum(f"sha256:{parts[0]}")
+            if expected:
+                log(f"Found checksum sidecar: {sidecar_url}")
+            return expected
+    return None
+
+
+def resolve_expected_checksum(
+    session: requests.Session, url: str, filename: str, expected_text: str, mode: str
+):
+    if mode == "off":
+        return None
+    if expected_text.strip():
+        expected = parse_checksum(expected_text)
+        # Checksum diminta eksplisit: jangan diam-diam lanjut tanpa verifikasi
+        if not expected:
+            raise ValueError(
+                f"Invalid checksum for {filename}: {expected_text.strip()}"
+                f" (use <algo>:<hex> with {', '.join(HASH_ALGOS)})"
+            )
+        return expected
+    return fetch_remote_checksum(session, url, filename)
+
+
+def checksum_sidecar_path(file_path: str, algo: str) -> str:
+    return f"{file_path}.{algo}"
+
+
+def read_cached_checksum(file_path: str, algo: str):
+    """Return the cached digest if the sidecar is newer than the file"""
+    sidecar = checksum_sidecar_path(file_path, algo)
+    if not os.path.exists(sidecar):
+        return None
+    if os.path.getmtime(sidecar) < os.path.getmtime(file_path):
+        return None
+    with open(sidecar, "r") as f:
+        parts = f.read().split()
+    return parts[0].lower() if parts else None
+
+
+def write_checksum_sidecar(file_path: str, algo: str, digest: str):
+    # Format sama dengan sha256sum agar bisa dicek ulang dengan `sha256sum -c`
+    with open(checksum_sidecar_path(file_path, algo), "w") as f:
+        f.write(f"{digest}  {os.path.basename(file_path)}\n")
+
+
+def compute_file_checksum(
+    file_path: str, algo: str = "sha256", chunk_size: int = 8 * 1024 * 1024
+) -> str:
+    """Hash the file in one chunked read, showing progress in place"""
+    hasher = hashlib.new(HASH_ALGOS[algo][0])
+    total = os.path.getsize(file_path)
+    progress = ProgressTelemetry()
+    done = 0
+    start = time.time()
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            done += len(chunk)
+            speed = done / max(time.time() - start, 1e-6)
+            progress.render(
+                f"🔐 Hashing {os.path.basename(file_path)}: {done * 100 / total:.1f}%"
+                f" | {format_bytes(speed)}/s"
+            )
+    return hasher.hexdigest()
+
+
+def verify_file_checksum(
+    file_path: str, expected, mode: str, verified_by_aria2: bool = False
+) -> bool:
+    """Check the file against the expected digest and cache the result in a sidecar"""
+    if mode == "off" or (not expected and mode != "always"):
+        return True
+    algo = expected[0] if expected else "sha256"
+
+    if expected and verified_by_aria2:
+        log(f"{algo} verified by aria2 during download")
+        write_checksum_sidecar(file_path, algo, expected[1])
+        return True
+
+    digest = read_cached_checksum(file_path, algo)
+    if digest:
+        log(f"Using cached {algo} from {checksum_sidecar_path(file_path, algo)}")
+    else:
+        digest = compute_file_checksum(file_path, algo)
+
+    if expected and digest != expected[1]:
+        log(f"{algo} mismatch: expected {expected[1]}, got {digest}", "ERROR")
+        return False
+    write_checksum_sidecar(file_path, algo, digest)
+    log(f"{algo}: {digest} {'(verified)' if expected else '(recorded)'}")
+    return True
+
+
+# ==========================
+# 🪝 COMPLETION HOOKS
+# ==========================
+VIDEO_EXTS = (".mp4", ".mkv", ".webm", ".mov", ".avi", ".ts", ".flv")
+
+
+def ensure_ffmpeg():
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        log("ffmpeg not found. Installing ffmpeg...")
+        subprocess.run(
+            ["apt-get", "install", "-y", "ffmpeg"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+
+def run_ffprobe(file_path: str) -> dict:
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "quiet",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            file_path,
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.strip()}")
+    return json.loads(result.stdout)
+
+
+def step_ffprobe(file_path: str, settings: dict) -> str:
+    metadata = run_ffprobe(file_path)
+    metadata["input_video_path"] = file_path
+    os.makedirs(settings["metadata_folder"], exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    json_path = os.path.join(settings["metadata_folder"], f"{base_name}.json")
+    with open(json_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    return f"metadata -> {json_path}"
+
+
+def step_split(file_path: str, settings: dict) -> str:
+    target_bytes = settings["split_target_mb"] * 1024 * 1024
+    size = os.path.getsize(file_path)
+    if size <= target_bytes:
+        return "under split target, kept whole"
+
+    duration = float(run_ffprobe(file_path)["format"]["duration"])
+    # Sisakan 5% karena segment hanya bisa dipotong di keyframe
+    segment_time = max(1, int(duration * target_bytes / size * 0.95))
+    base_name, ext = os.path.splitext(os.path.basename(file_path))
+    parts_dir = os.path.join(os.path.dirname(file_path), f"{base_name}_parts")
+    os.makedirs(parts_dir, exist_ok=True)
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-v",
+            "error",
+            "-i",
+            file_path,
+            "-map",
+            "0",
+            "-c",
+            "copy",
+            "-f",
+            "segment",
+            "-segment_time",
+            str(segment_time),
+            "-reset_timestamps",
+            "1",
+            os.path.join(parts_dir, f"{base_name}_part%03d{ext}"),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg split failed: {result.stderr.strip()[-300:]}")
+    return f"{len(os.listdir(parts_dir))} part(s) -> {parts_dir}"
+
+
+def mount_drive():
+    if not os.path.exists("/content/drive"):
+        log("Google Drive is not mounted, mounting now...", "WARNING")
+        from google.colab import drive
+
+        drive.mount("/content/drive")
+
+
+def step_copy_to_drive(file_path: str, settings: dict) -> str:
+    dest_dir = settings["drive_target_folder"]
+    os.makedirs(dest_dir, exist_ok=True)
+    name_only, ext = os.path.splitext(os.path.basename(file_path))
+    dest_path = os.path.join(dest_dir, os.path.basename(file_path))
+    counter = 1
+    while os.path.exists(dest_path):
+        dest_path = os.path.join(dest_dir, f"{name_only}_{counter}{ext}")
+        counter += 1
+    shutil.copy(file_path, dest_path)
+    return f"copied -> {dest_path}"
+
+
+POST_PROCESS_STEPS = {
+    "ffprobe": step_ffprobe,
+    "split": step_split,
+    "drive": step_copy_to_drive,
+}
+
+
+class PostProcessQueue:
+    """Run configured steps for each finished file while other downloads continue"""
+
+    def __init__(self, steps: list, workers: int, settings: dict):
+        unknown = [step for step in steps if step not in POST_PROCESS_STEPS]
+        if unknown:
+            raise ValueError(f"Unknown post-processing step(s): {', '.join(unknown)}")
+        self.steps = steps
+        self.settings = settings
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.futures = []
+        self.submitted = set()
+        if {"ffprobe", "split"} & set(steps):
+            ensure_ffmpeg()
+        if "drive" in steps and settings["drive_target_folder"].startswith(
+            "/content/drive"
+        ):
+            mount_drive()
+
+    def submit(self, file_path: str):
+        # File yang sama cukup diproses sekali per run
+        if os.path.abspath(file_path) in self.submitted:
+            return
+        self.submitted.add(os.path.abspath(file_path))
+        log(f"Queued post-processing for {os.path.basename(file_path)}")
+        self.futures.append(self.pool.submit(self.process, file_path))
+
+    def process(self, file_path: str) -> dict:
+        record = {"file": os.path.basename(file_path), "steps": []}
+        is_video = file_path.lower().endswith(VIDEO_EXTS)
+        for step in self.steps:
+            if step in ("ffprobe", "split") and not is_video:
+                record["steps"].append((step, "skipped", "not a video", 0.0))
+                continue
+            start = time.time()
+            try:
+                detail = POST_PROCESS_STEPS[step](file_path, self.settings)
+                status = "ok"
+            except Exception as e:
+                detail, status = str(e), "failed"
+            record["steps"].append((step, status, detail, time.time() - start))
+            log(
+                f"[{step}] {record['file']}: {detail}",
+                "ERROR" if status != "ok" else "INFO",
+            )
+            if status != "ok":
+                break
+        return record
+
+    def wait(self):
+        if not self.futures:
+            self.pool.shutdown()
+            return []
+        log("Waiting for post-processing to finish...")
+        records = [future.result() for future in self.futures]
+        self.pool.shutdown()
+        print("\n🪝 Post-processing Summary")
+        for record in records:
+            print(f"╭📄 {record['file']}")
+            for i, (step, status, detail, elapsed) in enumerate(record["steps"]):
+                branch = "╰" if i == len(record["steps"]) - 1 else "├"
+                print(f"{branch} {step:<8} {status:<7} {elapsed:>6.1f}s  {detail}")
+        return records
+
+
+def create_post_process_queue(steps_text: str, workers: int, settings: dict):
+    steps = [step.strip().lower() for step in steps_text.split(",") if step.strip()]
+    if not steps:
+        return None
+    log(f"Post-processing enabled: {' -> '.join(steps)}")
+    return PostProcessQueue(steps, workers, settings)
+
+
 # ==========================
 # 🚀 MAIN DOWNLOAD FUNCTION
 # ==========================
-def download_file(
+def plan_download(
     download_url: str,
     filename: str,
     output_dir: str,
     aria2_parallel_conn: int,
     retry_count: int,
     timeout: int,
-):
+    profile_path: str = None,
+    session: requests.Session = None,
+    expected_checksum: str = "",
+    checksum_mode: str = "off",
+    mirrors: list = None,
+) -> dict:
+    """Probe the URL and settle URIs, connections, filename and checksum for both engines"""
     os.makedirs(output_dir, exist_ok=True)
+    split_size = "1M"
+    if profile_path:
+        aria2_parallel_conn, split_size = resolve_host_settings(
+            download_url, aria2_parallel_conn, profile_path
+        )
+    session = session or create_http_session()
+    probe = probe_url(session, download_url)
+    aria2_uri, aria2_parallel_conn, file_allocation = plan_from_probe(
+        download_url, aria2_parallel_conn, probe
+    )
+    aria2_uris = resolve_mirrors(session, probe, mirrors) or [aria2_uri]
     aria2_parallel_conn = validate_parallel_connections(aria2_parallel_conn)
-    final_filename = get_output_filename(download_url, filename)
+    final_filename = get_output_filename(download_url, filename, probe)
     output_path = os.path.join(output_dir, final_filename)
+    expected = resolve_expected_checksum(
+        session, download_url, final_filename, expected_checksum, checksum_mode
+    )
 
     print_download_summary(
         download_url,
@@ -259,48 +1467,605 @@ def download_file(
         timeout,
     )
 
+    print_probe_summary(probe)
+
+    return {
+        "url": download_url,
+        "uris": aria2_uris,
+        "connections": aria2_parallel_conn,
+        "split_size": split_size,
+        "file_allocation": file_allocation,
+        "filename": final_filename,
+        "output_path": output_path,
+        "expected": expected,
+        "probe": probe,
+    }
+
+
+def skip_completed_download(
+    plan: dict, resume: bool, checksum_mode: str, hooks: PostProcessQueue = None
+) -> bool:
+    """True if a previous run already finished the file (after re-checking it)"""
+    if not resume:
+        return False
+    if prepare_resume(plan["url"], plan["output_path"], plan["probe"]) != "complete":
+        return False
+    log("File already fully downloaded, skipping")
+    print_download_result(plan["filename"], plan["url"], plan["output_path"], 0.0)
+    if not verify_file_checksum(plan["output_path"], plan["expected"], checksum_mode):
+        raise RuntimeError("Checksum verification failed")
+    if hooks:
+        hooks.submit(plan["output_path"])
+    return True
+
+
+def finish_download(
+    plan: dict,
+    checksum_mode: str,
+    elapsed: float,
+    telemetry,
+    hooks: PostProcessQueue = None,
+) -> str:
+    output_path = plan["output_path"]
+    print_download_result(plan["filename"], plan["url"], output_path, elapsed)
+    telemetry.print_summary()
+
+    if not verify_downloaded_file(
+        output_path, expected_size=plan["probe"]["content_length"]
+    ):
+        raise RuntimeError("Downloaded file verification failed")
+    if not verify_file_checksum(
+        output_path,
+        plan["expected"],
+        checksum_mode,
+        verified_by_aria2=bool(plan["expected"]),
+    ):
+        discard_partial(output_path)
+        raise RuntimeError("Checksum verification failed")
+
+    finish_resume(output_path)
+    if hooks:
+        hooks.submit(output_path)
+    return output_path
+
+
+def handle_download_failure(plan: dict, resume: bool, error: Exception):
+    log(f"Download failed: {str(error)}", "ERROR")
+    output_path = plan["output_path"]
+    if resume:
+        if os.path.exists(output_path) or os.path.exists(output_path + ".aria2"):
+            log("Partial data kept, re-run the cell to resume", "WARNING")
+    elif os.path.exists(output_path):
+        os.remove(output_path)
+
+
+def download_file(
+    download_url: str,
+    filename: str,
+    output_dir: str,
+    aria2_parallel_conn: int,
+    retry_count: int,
+    timeout: int,
+    resume: bool = False,
+    metrics_dir: str = None,
+    profile_path: str = None,
+    session: requests.Session = None,
+    expected_checksum: str = "",
+    checksum_mode: str = "off",
+    mirrors: list = None,
+    hooks: PostProcessQueue = None,
+):
+    plan = plan_download(
+        download_url,
+        filename,
+        output_dir,
+        aria2_parallel_conn,
+        retry_count,
+        timeout,
+        profile_path,
+        session,
+        expected_checksum,
+        checksum_mode,
+        mirrors,
+    )
+    if skip_completed_download(plan, resume, checksum_mode, hooks):
+        return plan["output_path"]
+    if profile_path:
+        log(
+            "Adaptive tuning needs the RPC engine: using saved host profiles"
+            " without tuning or updating them"
+        )
+
     process = None
+    telemetry = ProgressTelemetry(metrics_file_path(metrics_dir, plan["filename"]))
     try:
         start_time = time.time()
         process = run_download_process(
-            download_url,
+            plan["uris"],
             output_dir,
-            final_filename,
-            aria2_parallel_conn,
+            plan["filename"],
+            plan["connections"],
             retry_count,
             timeout,
+            resume,
+            plan["split_size"],
+            plan["file_allocation"],
+            aria2_checksum(plan["expected"]),
         )
 
         try:
-            display_download_progress(process)
+            display_download_progress(process, telemetry)
             process.wait(timeout=timeout * 2)
         except subprocess.TimeoutExpired:
-            logger.error(f"Download timed out after {timeout*2} seconds")
+            log(f"Download timed out after {timeout*2} seconds", "ERROR")
             raise
 
-        elapsed = time.time() - start_time
-        print_download_result(final_filename, download_url, output_path, elapsed)
+        if process.returncode != 0:
+            if str(process.returncode) == CHECKSUM_ERROR_CODE:
+                discard_partial(plan["output_path"])
+                raise RuntimeError("Checksum validation failed")
+            raise RuntimeError(f"aria2c exited with code {process.returncode}")
+
+        return finish_download(
+            plan, checksum_mode, time.time() - start_time, telemetry, hooks
+        )
 
-        if not verify_downloaded_file(output_path):
-            raise RuntimeError("Downloaded file verification failed")
+    except KeyboardInterrupt:
+        log("Download interrupted by user", "WARNING")
+        raise
+    except Exception as e:
+        handle_download_failure(plan, resume, e)
+        raise
+    finally:
+        telemetry.close()
+        cleanup_resources(process, plan["output_path"])
 
-        return output_path
+
+def download_file_rpc(
+    manager: Aria2Manager,
+    download_url: str,
+    filename: str,
+    output_dir: str,
+    aria2_parallel_conn: int,
+    retry_count: int,
+    timeout: int,
+    resume: bool = False,
+    metrics_dir: str = None,
+    profile_path: str = None,
+    session: requests.Session = None,
+    expected_checksum: str = "",
+    checksum_mode: str = "off",
+    mirrors: list = None,
+    hooks: PostProcessQueue = None,
+):
+    plan = plan_download(
+        download_url,
+        filename,
+        output_dir,
+        aria2_parallel_conn,
+        retry_count,
+        timeout,
+        profile_path,
+        session,
+        expected_checksum,
+        checksum_mode,
+        mirrors,
+    )
+    if skip_completed_download(plan, resume, checksum_mode, hooks):
+        return plan["output_path"]
+
+    options = build_rpc_options(
+        output_dir,
+        plan["filename"],
+        plan["connections"],
+        retry_count,
+        timeout,
+        resume,
+        plan["split_size"],
+        plan["file_allocation"],
+        aria2_checksum(plan["expected"]),
+        len(plan["uris"]),
+    )
+
+    gid = None
+    tuner = None
+    telemetry = ProgressTelemetry(metrics_file_path(metrics_dir, plan["filename"]))
+    try:
+        start_time = time.time()
+        gid = manager.add_uri(plan["uris"], options)
+        log(f"Download queued via RPC (gid {gid})")
+        if profile_path:
+            tuner = AdaptiveTuner(
+                manager,
+                gid,
+                download_url,
+                plan["connections"],
+                profile_path,
+                mirror_count=len(plan["uris"]),
+            )
+        result = wait_for_rpc_downloads(
+            manager,
+            [gid],
+            stall_timeout=timeout * 2,
+            telemetry=telemetry,
+            tuner=tuner,
+        )[gid]
+        if result["status"] != "complete":
+            if result["error_code"] == CHECKSUM_ERROR_CODE:
+                discard_partial(plan["output_path"])
+            raise RuntimeError(result["error"] or f"Download {result['status']}")
+
+        return finish_download(
+            plan, checksum_mode, time.time() - start_time, telemetry, hooks
+        )
 
     except KeyboardInterrupt:
         log("Download interrupted by user", "WARNING")
         raise
     except Exception as e:
-        log(f"Download failed: {str(e)}", "ERROR")
-        if os.path.exists(output_path):
-            os.remove(output_path)
+        handle_download_failure(plan, resume, e)
         raise
     finally:
-        cleanup_resources(process, output_path)
+        telemetry.close()
+        if tuner:
+            tuner.finish()
+        # Hapus dari daemon agar control file tersimpan dan gid tidak menggantung
+        if gid:
+            manager.remove(gid)
+
+
+# ==========================
+# 📚 BATCH QUEUE
+# ==========================
+def parse_url_list(text: str) -> list:
+    """
+    Parse `URL [MIRROR ...] | filename | checksum` lines, where everything after
+    the first URL is optional. Blank lines and # comments are skipped.
+    """
+    entries = []
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        urls, name, checksum = (line.split("|") + ["", ""])[:3]
+        urls = urls.split()
+        entries.append(
+            {
+                "url": urls[0],
+                "mirrors": urls[1:],
+                "filename": name.strip(),
+                "checksum": checksum.strip(),
+            }
+        )
+    return entries
+
+
+def load_batch_entries(url_list: str, url_list_file: str) -> list:
+    entries = []
+    if url_list.strip():
+        entries.extend(
+            {"url": url, "mirrors": [], "filename": "", "checksum": ""}
+            for url in url_list.split()
+        )
+    if url_list_file.strip():
+        if not os.path.exists(url_list_file):
+            raise FileNotFoundError(f"URL list file not found: {url_list_file}")
+        with open(url_list_file, "r", encoding="utf-8") as f:
+            entries.extend(parse_url_list(f.read()))
+    return entries
+
+
+def prepare_batch_entries(
+    entries: list,
+    output_dir: str,
+    session: requests.Session,
+    checksum_mode: str = "off",
+) -> list:
+    """Probe every URL over one session, then resolve unique output names"""
+    log(f"Probing {len(entries)} URL(s)...")
+    probes = probe_urls(session, [entry["url"] for entry in entries])
+    used_names = set()
+    for entry, probe in zip(entries, probes):
+        entry["probe"] = probe
+        name = get_output_filename(entry["url"], entry["filename"], probe)
+        base, ext = os.path.splitext(name)
+        counter = 1
+        while name in used_names:
+            name = f"{base}_{counter}{ext}"
+            counter += 1
+        used_names.add(name)
+        entry["filename"] = name
+        entry["output_path"] = os.path.join(output_dir, name)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        checksums = pool.map(
+            lambda e: resolve_expected_checksum(
+                session, e["url"], e["filename"], e["checksum"], checksum_mode
+            ),
+            entries,
+        )
+        for entry, expected in zip(entries, checksums):
+            entry["expected"] = expected
+    return entries
+
+
+def print_batch_table(results: list, elapsed: float):
+    total_bytes = sum(r["size"] for r in results)
+    ok_count = sum(1 for r in results if r["status"] in ("complete", "skipped"))
+    print(f"\n📊 Batch Summary: {ok_count}/{len(results)} completed")
+    print(
+        f"{'#':>4}  {'Status':<9} {'Size':>11} {'Time':>9} {'Avg Speed':>13}  Filename"
+    )
+    for i, r in enumerate(results, 1):
+        speed = r["size"] / r["elapsed"] if r["elapsed"] else 0
+        print(
+            f"{i:>4}  {r['status']:<9} {format_bytes(r['size']):>11}"
+            f" {r['elapsed']:>8.1f}s {format_bytes(speed) + '/s':>13}  {r['filename']}"
+        )
+    overall = total_bytes / elapsed if elapsed else 0
+    print(
+        f"╰📦 Total {format_bytes(total_bytes)} in {elapsed:.1f}s"
+        f" ({format_bytes(overall)}/s overall)"
+    )
+
+
+def run_download_queue(
+    manager: Aria2Manager,
+    entries: list,
+    output_dir: str,
+    aria2_parallel_conn: int,
+    retry_count: int,
+    timeout: int,
+    max_active: int,
+    max_connections_per_host: int,
+    resume: bool = False,
+    metrics_dir: str = None,
+    profile_path: str = None,
+    session: requests.Session = None,
+    checksum_mode: str = "off",
+    hooks: PostProcessQueue = None,
+) -> list:
+    """Feed entries to aria2 under a global slot limit and a per-host connection cap"""
+    os.makedirs(output_dir, exist_ok=True)
+    aria2_parallel_conn = validate_parallel_connections(aria2_parallel_conn)
+    conns_per_download = max(1, min(aria2_parallel_conn, max_connections_per_host))
+    session = session or create_http_session()
+    entries = prepare_batch_entries(entries, output_dir, session, checksum_mode)
+    for entry in entries:
+        connections, entry["split_size"] = aria2_parallel_conn, "1M"
+        if profile_path:
+            connections, entry["split_size"] = resolve_host_settings(
+                entry["url"], aria2_parallel_conn, profile_path
+            )
+        uri, connections, entry["file_allocation"] = plan_from_probe(
+            entry["url"], connections, entry["probe"]
+        )
+        entry["uris"] = resolve_mirrors(session, entry["probe"], entry["mirrors"])
+        entry["uris"] = entry["uris"] or [uri]
+        entry["connections"] = max(1, min(connections, conns_per_download))
+        # Tiap host mirror menerima sampai `connections` koneksi (max-connection-per-server)
+        entry["hosts"] = sorted({urlparse(u).hostname or "" for u in entry["uris"]})
+    if profile_path:
+        # Tuner mengubah koneksi per gid, bentrok dengan batas koneksi per host di sini
+        log(
+            "Adaptive tuning only runs for single RPC downloads: batch entries use"
+            " saved host profiles without tuning or updating them"
+        )
+    log(
+        f"Batch queue: {len(entries)} file(s) | {max_active} active max"
+        f" | {max_connections_per_host} connections per host"
+    )
+
+    pending = list(entries)
+    active = {}
+    host_connections = {}
+    results = []
+    # Byte file selesai dihitung sekali per gid, bukan di setiap tick
+    finished_gids = set()
+    finished_bytes = 0
+    progress = {}
+    batch_start = time.time()
+    telemetry = ProgressTelemetry(
+        metrics_file_path(metrics_dir, "batch"), track_gid="total"
+    )
+
+    while pending or active:
+        for entry in list(pending):
+            if len(active) >= max_active:
+                break
+            if any(
+                host_connections.get(host, 0) + entry["connections"]
+                > max_connections_per_host
+                for host in entry["hosts"]
+            ):
+                continue
+            pending.remove(entry)
+            if resume:
+                verdict = prepare_resume(
+                    entry["url"], entry["output_path"], entry["probe"]
+                )
+                if verdict == "complete":
+                    log(f"Already downloaded: {entry['filename']}")
+                    size = os.path.getsize(entry["output_path"])
+                    status = "skipped"
+                    if not verify_file_checksum(
+                        entry["output_path"], entry["expected"], checksum_mode
+                    ):
+                        status = "corrupt"
+                    elif hooks:
+                        # Selesai sebelum run terputus: tetap diproses
+                        hooks.submit(entry["output_path"])
+                    results.append(
+                        {**entry, "status": status, "size": size, "elapsed": 0.0}
+                    )
+                    finished_bytes += size
+                    continue
+            options = build_rpc_options(
+                output_dir,
+                entry["filename"],
+                entry["connections"],
+                retry_count,
+                timeout,
+                resume,
+                entry["split_size"],
+                entry["file_allocation"],
+                aria2_checksum(entry["expected"]),
+                len(entry["uris"]),
+            )
+            try:
+                gid = manager.add_uri(entry["uris"], options)
+            except Aria2RPCError as e:
+                log(f"Failed to queue {entry['url']}: {e}", "ERROR")
+                results.append({**entry, "status": "error", "size": 0, "elapsed": 0.0})
+                continue
+            entry["started"] = time.time()
+            active[gid] = entry
+            for host in entry["hosts"]:
+                host_connections[host] = (
+                    host_connections.get(host, 0) + entry["connections"]
+                )
+
+        aggregate = {"gid": "total", "done": 0, "total": 0, "speed": 0}
+        aggregate["connections"] = 0
+        for gid, entry in list(active.items()):
+            info = parse_rpc_status(manager.tell_status(gid))
+            if info["status"] == "active":
+                telemetry.record(sample_from_rpc(info, entry["filename"]))
+            if info["status"] not in ("complete", "error", "removed"):
+                if stalled_seconds(progress, gid, info) > timeout * 2:
+                    log(f"No progress for {timeout * 2}s: {entry['filename']}", "ERROR")
+                    manager.remove(gid)
+                    info["status"] = "timeout"
+                else:
+                    for key in ("done", "total", "speed", "connections"):
+                        aggregate[key] += info[key]
+                    continue
+            manager.remove(gid)
+            del active[gid]
+            for host in entry["hosts"]:
+                host_connections[host] -= entry["connections"]
+            if info["error"]:
+                log(f"{entry['filename']}: {info['error']}", "ERROR")
+            if info["error_code"] == CHECKSUM_ERROR_CODE:
+                discard_partial(entry["output_path"])
+                info["status"] = "corrupt"
+            if info["status"] == "complete":
+                finish_resume(entry["output_path"])
+                if not verify_file_checksum(
+                    entry["output_path"],
+                    entry["expected"],
+                    checksum_mode,
+                    verified_by_aria2=bool(entry["expected"]),
+                ):
+                    info["status"] = "corrupt"
+                elif hooks:
+                    hooks.submit(entry["output_path"])
+            results.append(
+                {
+                    **entry,
+                    "status": info["status"],
+                    "size": info["done"],
+                    "elapsed": time.time() - entry["started"],
+                }
+            )
+            if gid not in finished_gids:
+                finished_gids.add(gid)
+                finished_bytes += info["done"]
+
+        if pending or active:
+            aggregate["done"] += finished_bytes
+            aggregate["total"] += finished_bytes
+            sample = sample_from_rpc({**aggregate, "eta": None}, "batch")
+            telemetry.record(sample)
+            telemetry.render(
+                f"🗂️ Active {len(active)} | Queued {len(pending)} | Finished"
+                f" {len(results)}/{len(entries)} | {format_sample(sample)}"
+            )
+            time.sleep(1)
+
+    print_batch_table(results, time.time() - batch_start)
+    telemetry.print_summary()
+    return results
 
 
 # ==========================
 # ✅ EXECUTE DOWNLOAD
 # ==========================
-download_file(
-    download_url, filename, output_dir, aria2_parallel_conn, retry_count, timeout
+batch_entries = load_batch_entries(url_list, url_list_file)
+profile_path = host_profile_path if adaptive_tuning else None
+http_session = create_http_session()
+hooks = create_post_process_queue(
+    post_process_steps,
+    post_process_workers,
+    {
+        "metadata_folder": metadata_folder,
+        "split_target_mb": split_target_mb,
+        "drive_target_folder": drive_target_folder,
+    },
 )
+
+try:
+    if batch_entries or engine == "rpc":
+        manager = Aria2Manager(
+            output_dir, rpc_port, max_concurrent_downloads, max_overall_download_limit
+        )
+        try:
+            manager.start()
+            if batch_entries:
+                run_download_queue(
+                    manager,
+                    batch_entries,
+                    output_dir,
+                    aria2_parallel_conn,
+                    retry_count,
+                    timeout,
+                    max_concurrent_downloads,
+                    max_connections_per_host,
+                    resume_downloads,
+                    metrics_dir,
+                    profile_path,
+                    http_session,
+                    checksum_mode,
+                    hooks,
+                )
+            else:
+                download_file_rpc(
+                    manager,
+                    download_url,
+                    filename,
+                    output_dir,
+                    aria2_parallel_conn,
+                    retry_count,
+                    timeout,
+                    resume_downloads,
+                    metrics_dir,
+                    profile_path,
+                    http_session,
+                    expected_checksum,
+                    checksum_mode,
+                    mirror_urls.split(),
+                    hooks,
+                )
+        finally:
+            if not keep_rpc_daemon:
+                manager.shutdown()
+    else:
+        download_file(
+            download_url,
+            filename,
+            output_dir,
+            aria2_parallel_conn,
+            retry_count,
+            timeout,
+            resume_downloads,
+            metrics_dir,
+            profile_path,
+            http_session,
+            expected_checksum,
+            checksum_mode,
+            mirror_urls.split(),
+            hooks,
+        )
+finally:
+    if hooks:
+        hooks.wait()
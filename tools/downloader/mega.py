@@ -1,9 +1,16 @@
 # @title 🚀 MEGA Downloader (File & Folder)
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import json
+import queue
 import subprocess
 import os
+import re
+import requests
 import shutil
 import sys
+import threading
 import time
 
 # ===================== USER INPUT =====================
@@ -12,7 +19,11 @@ mega_link = ""  # @param {type:"string"}
 output_path = "/content/media_toolkit/mega_download"  # @param {type:"string"}
 timeout_minutes = 60  # @param {type:"integer", min:1, max:240}
 min_disk_space_mb = 100  # @param {type:"integer", min:10}
+disk_safety_margin_pct = 5  # @param {type:"integer", min:0, max:50}
 show_logs = True  # @param {type:"boolean"}
+parallel_downloads = 4  # @param {type:"integer", min:1, max:8}
+quota_wait_minutes = 360  # @param {type:"integer", min:1, max:1440}
+max_quota_waits = 2  # @param {type:"integer", min:0, max:10}
 # =====================================================
 
 
@@ -25,20 +36,34 @@ def log(message, level="INFO"):
 class Config:
     DEFAULT_TIMEOUT = timeout_minutes * 60
     MIN_DISK_SPACE = min_disk_space_mb * 1024 * 1024  # in bytes
+    SAFETY_MARGIN = disk_safety_margin_pct / 100
+    MEGA_API = "https://g.api.mega.co.nz/cs"
+    PARALLEL_DOWNLOADS = parallel_downloads
+    QUOTA_WAIT = quota_wait_minutes * 60
+    MAX_QUOTA_WAITS = max_quota_waits
+    QUOTA_STATE_FILE = ".mega_quota_state.json"
 
 
 # =============== DISK & VALIDATION ====================
-def check_disk_space(path: str) -> bool:
+def check_disk_space(path: str, required_bytes: int = 0) -> bool:
+    """Free space must cover the download plus a margin of at least MIN_DISK_SPACE"""
     try:
         stat = shutil.disk_usage(path)
         free = stat.free
-        if free < Config.MIN_DISK_SPACE:
+        margin = max(Config.MIN_DISK_SPACE, int(required_bytes * Config.SAFETY_MARGIN))
+        needed = required_bytes + margin
+        if free < needed:
             log(
-                f"Insufficient disk space: {free/1024/1024:.2f}MB available, {min_disk_space_mb}MB required.",
+                f"Insufficient disk space: {free/1024/1024:.2f}MB available,"
+                f" {needed/1024/1024:.2f}MB required"
+                f" ({required_bytes/1024/1024:.2f}MB + {margin/1024/1024:.2f}MB margin).",
                 level="ERROR",
             )
             return False
-        log(f"Disk space OK: {free/1024/1024:.2f}MB available")
+        log(
+            f"Disk space OK: {free/1024/1024:.2f}MB available,"
+            f" {needed/1024/1024:.2f}MB required"
+        )
         return True
     except Exception as e:
         log(f"Failed to check disk space: {e}", level="ERROR")
@@ -49,6 +74,42 @@ def validate_url(url: str) -> bool:
     return url.startswith(("https://mega.nz/", "mega://"))
 
 
+def mega_api(request: dict, params: dict = None):
+    response = requests.post(
+        Config.MEGA_API,
+        params={"id": int(time.time()), **(params or {})},
+        json=[request],
+        timeout=30,
+    )
+    response.raise_for_status()
+    result = response.json()
+    # Error API dikembalikan sebagai angka negatif
+    if isinstance(result, int) or isinstance(result[0], int):
+        raise RuntimeError(f"MEGA API error {result}")
+    return result[0]
+
+
+def get_remote_size(url: str, link_type: str) -> int | None:
+    """Total bytes behind a file or folder link, read from the public API (no key needed)"""
+    pattern = (
+        r"/file/([^#/]+)|#!([^!]+)!"
+        if link_type == "file"
+        else r"/folder/([^#/]+)|#F!([^!]+)!"
+    )
+    match = re.search(pattern, url)
+    if not match:
+        return None
+    node_id = match.group(1) or match.group(2)
+    try:
+        if link_type == "file":
+            return int(mega_api({"a": "g", "p": node_id})["s"])
+        nodes = mega_api({"a": "f", "c": 1, "r": 1}, params={"n": node_id})["f"]
+        return sum(node.get("s", 0) for node in nodes if node.get("t") == 0)
+    except Exception as e:
+        log(f"Could not read remote size: {e}", level="WARNING")
+        return None
+
+
 # =============== INSTALL TOOLS ====================
 def install_megatools() -> bool:
     log("Checking megatools...")
@@ -71,59 +132,390 @@ def install_megatools() -> bool:
             return False
 
 
+# =============== TRANSFER QUOTA ====================
+# 509 hanya dalam konteks status HTTP, bukan angka progres seperti "509.1 MiB"
+QUOTA_ERROR_RE = re.compile(
+    r"over ?quota|transfer quota|bandwidth limit|EOVERQUOTA"
+    r"|(?:HTTP|error|status)[ :]*509\b|\(509\)",
+    re.IGNORECASE,
+)
+QUOTA_WAIT_RE = re.compile(r"(\d+)\s*(?:seconds|secs|sec|s)\b", re.IGNORECASE)
+
+
+def run_megadl(cmd: list, on_line=None, timeout: int = None) -> tuple:
+    """Run megadl, return (exit code, tail of its combined output)
+
+    Output is read on a separate thread; the timeout counts from the last
+    line megadl printed, so only a silent (stuck) process is killed.
+    """
+    timeout = timeout or Config.DEFAULT_TIMEOUT
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    lines_queue = queue.Queue()
+
+    def reader():
+        for line in proc.stdout:
+            lines_queue.put(line)
+        lines_queue.put(None)
+
+    threading.Thread(target=reader, daemon=True).start()
+    deadline = time.time() + timeout
+    # Baris progres bisa ribuan: simpan ekornya saja
+    lines = deque(maxlen=50)
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            proc.kill()
+            proc.wait()
+            raise subprocess.TimeoutExpired(cmd, timeout, "\n".join(lines))
+        try:
+            line = lines_queue.get(timeout=min(remaining, 5))
+        except queue.Empty:
+            continue
+        if line is None:
+            break
+        # Progres (\r juga dibaca sebagai baris) berarti megadl masih hidup
+        deadline = time.time() + timeout
+        line = line.strip()
+        if line:
+            lines.append(line)
+            if on_line:
+                on_line(line)
+    return proc.wait(), "\n".join(lines)
+
+
+def quota_error_lines(output: str) -> list:
+    """megadl ERROR lines reporting an exhausted quota; progress lines are ignored"""
+    return [
+        line
+        for line in output.splitlines()
+        if line.lstrip().upper().startswith("ERROR") and QUOTA_ERROR_RE.search(line)
+    ]
+
+
+def is_quota_error(output: str) -> bool:
+    return bool(quota_error_lines(output))
+
+
+def format_wait(seconds: float) -> str:
+    if seconds < 60:
+        return f"{max(int(seconds), 0)}s"
+    minutes = int(seconds // 60)
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+
+class QuotaScheduler:
+    """Pause transfers while MEGA's transfer quota is exhausted and resume afterwards"""
+
+    def __init__(self, link: str, path: str):
+        self.link = link
+        self.state_path = os.path.join(path, Config.QUOTA_STATE_FILE)
+        self.resume_at = 0.0
+        self.waits = 0
+        self.waited = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def exhausted(self) -> bool:
+        return time.time() < self.resume_at
+
+    def trip(self, output: str):
+        with self.lock:
+            if self.exhausted:
+                return
+            # Waktu tunggu hanya dari pesan quota itu sendiri
+            match = None
+            for line in quota_error_lines(output):
+                match = match or QUOTA_WAIT_RE.search(line)
+            wait = int(match.group(1)) if match else Config.QUOTA_WAIT
+            self.resume_at = time.time() + wait
+            log(
+                f"Transfer quota exhausted, pausing new transfers for {format_wait(wait)}",
+                level="WARNING",
+            )
+
+    def save(self, completed: list, remaining: list):
+        state = {
+            "link": self.link,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "resume_at": self.resume_at,
+            "completed": completed,
+            "remaining": remaining,
+        }
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+
+    def load(self) -> dict | None:
+        if not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("link") != self.link:
+            return None
+        self.resume_at = state.get("resume_at", 0.0)
+        return state
+
+    def clear(self):
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def report(self, remaining: list):
+        size = sum(entry.get("size", 0) for entry in remaining)
+        resume_time = datetime.now() + timedelta(seconds=self.resume_at - time.time())
+        log(
+            f"{len(remaining)} file(s) ({format_size(size)}) rescheduled,"
+            f" resuming at {resume_time:%H:%M} (in {format_wait(self.resume_at - time.time())})",
+            level="WARNING",
+        )
+        log(f"Progress saved to {self.state_path}")
+
+    def wait(self) -> bool:
+        """Sleep until the quota window resets; False once the wait budget is used up"""
+        if self.waits >= Config.MAX_QUOTA_WAITS:
+            resume_time = datetime.now() + timedelta(
+                seconds=max(self.resume_at - time.time(), 0)
+            )
+            log(
+                f"Quota wait limit reached, run this cell again after {resume_time:%H:%M}",
+                level="ERROR",
+            )
+            return False
+        self.waits += 1
+        wait_start = time.time()
+        while self.exhausted:
+            remaining = self.resume_at - time.time()
+            log(f"Waiting for transfer quota reset: {format_wait(remaining)} left")
+            time.sleep(min(remaining, 600))
+        self.waited += time.time() - wait_start
+        log("Quota window reset, resuming transfers")
+        return True
+
+
 # =============== DOWNLOAD FILE ====================
 def download_file(url: str, path: str) -> bool:
     log(f"Starting file download: {url}")
+    scheduler = QuotaScheduler(url, path)
     try:
-        cmd = ["megadl", "--path", path, url]
-        proc = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
-        )
-        last_line = ""
-        for line in proc.stdout:
-            line = line.strip()
-            if line:
-                log(line)
-                last_line = line
-        print()  # newline
-        exit_code = proc.wait()
-        if exit_code == 0:
-            log("File download complete")
-            return True
-        else:
-            log("File download failed", level="ERROR")
+        if scheduler.load() and scheduler.exhausted and not scheduler.wait():
             return False
+        cmd = ["megadl", "--path", path, url]
+        while True:
+            exit_code, output = run_megadl(cmd, on_line=log)
+            print()  # newline
+            if exit_code == 0:
+                scheduler.clear()
+                log("File download complete")
+                return True
+            if not is_quota_error(output):
+                log("File download failed", level="ERROR")
+                return False
+            scheduler.trip(output)
+            scheduler.save([], [{"link": url}])
+            scheduler.report([{"link": url}])
+            if not scheduler.wait():
+                return False
     except Exception as e:
         log(f"Error during file download: {e}", level="ERROR")
         return False
 
 
+# =============== FOLDER LISTING ====================
+# megals --long: <handle> <owner> <type> <size> <date> <time> <path>
+MEGALS_LINE_RE = re.compile(
+    r"^(?P<handle>\S+)\s+(?P<owner>\S+)\s+(?P<type>\d)\s+(?P<size>\d+|-)\s+"
+    r"\S+\s+\S+\s+(?P<path>/.+)$"
+)
+FOLDER_LINK_RE = re.compile(r"^(https://mega\.nz/folder/[^#/]+#[^/]+)")
+
+
+def format_size(num_bytes: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if num_bytes < 1024:
+            return f"{num_bytes:.2f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.2f} TB"
+
+
+def list_folder(url: str) -> list:
+    """Files of a public folder link as dicts with handle, size and relative path"""
+    result = subprocess.run(["megals", "--long", url], capture_output=True, text=True)
+    if result.returncode != 0:
+        log(f"megals failed: {result.stderr.strip()}", level="WARNING")
+        return []
+    files = []
+    for line in result.stdout.splitlines():
+        match = MEGALS_LINE_RE.match(line.strip())
+        if match and match.group("type") == "0":
+            files.append(
+                {
+                    "handle": match.group("handle"),
+                    "size": int(match.group("size")),
+                    "path": match.group("path").lstrip("/"),
+                }
+            )
+    return files
+
+
+def folder_file_link(folder_url: str, handle: str) -> str:
+    base = FOLDER_LINK_RE.match(folder_url).group(1)
+    return f"{base}/file/{handle}"
+
+
 # =============== DOWNLOAD FOLDER ====================
+def download_folder_file(folder_url: str, entry: dict, path: str) -> dict:
+    target_dir = os.path.join(path, os.path.dirname(entry["path"]))
+    os.makedirs(target_dir, exist_ok=True)
+    # Tanpa --no-progress: baris progres (tidak ditampilkan) menjaga idle timeout
+    cmd = [
+        "megadl",
+        "--path",
+        target_dir,
+        folder_file_link(folder_url, entry["handle"]),
+    ]
+    start = time.time()
+    try:
+        exit_code, output = run_megadl(cmd)
+    except subprocess.TimeoutExpired:
+        exit_code, output = -1, f"no output for {timeout_minutes} minutes"
+    elapsed = max(time.time() - start, 0.001)
+    local_path = os.path.join(path, entry["path"])
+    ok = exit_code == 0 and os.path.exists(local_path)
+    quota = not ok and is_quota_error(output)
+    if not ok and not quota:
+        log(f"{entry['path']}: {output[-300:]}", level="ERROR")
+    return {**entry, "ok": ok, "quota": quota, "elapsed": elapsed, "output": output}
+
+
+def download_folder_parallel(url: str, path: str, files: list) -> bool:
+    """One megadl per file, at most Config.PARALLEL_DOWNLOADS at a time"""
+    pending, skipped = [], []
+    for entry in files:
+        local_path = os.path.join(path, entry["path"])
+        if os.path.exists(local_path) and os.path.getsize(local_path) == entry["size"]:
+            skipped.append(entry)
+        else:
+            pending.append(entry)
+
+    total_bytes = sum(entry["size"] for entry in pending)
+    log(
+        f"{len(files)} file(s) in folder | {len(skipped)} already present"
+        f" | {len(pending)} to download ({format_size(total_bytes)})"
+    )
+    if not check_disk_space(path, total_bytes):
+        return False
+
+    scheduler = QuotaScheduler(url, path)
+    if scheduler.load() and scheduler.exhausted:
+        log("Transfer quota from the previous run has not reset yet")
+        scheduler.report(pending)
+        if not scheduler.wait():
+            return False
+
+    done_bytes = 0
+    done_lock = threading.Lock()
+    completed = [entry["path"] for entry in skipped]
+    start = time.time()
+
+    def worker(entry: dict) -> dict:
+        nonlocal done_bytes
+        # Kuota habis: jangan mulai transfer baru, jadwalkan ulang
+        if scheduler.exhausted:
+            return {**entry, "ok": False, "quota": True, "elapsed": 0}
+        result = download_folder_file(url, entry, path)
+        if result["quota"]:
+            scheduler.trip(result["output"])
+        if result["ok"]:
+            with done_lock:
+                completed.append(entry["path"])
+                done_bytes += entry["size"]
+                aggregate = done_bytes / max(
+                    time.time() - start - scheduler.waited, 0.001
+                )
+            log(
+                f"{entry['path']} | {format_size(entry['size'])}"
+                f" in {result['elapsed']:.1f}s"
+                f" ({format_size(entry['size'] / result['elapsed'])}/s)"
+                f" | total {format_size(done_bytes)}/{format_size(total_bytes)}"
+                f" @ {format_size(aggregate)}/s",
+                "FILE",
+            )
+        return result
+
+    failed = []
+    while pending:
+        with ThreadPoolExecutor(max_workers=Config.PARALLEL_DOWNLOADS) as pool:
+            results = list(pool.map(worker, pending))
+        failed += [r for r in results if not r["ok"] and not r["quota"]]
+        pending = [
+            {key: r[key] for key in ("handle", "size", "path")}
+            for r in results
+            if r["quota"]
+        ]
+        if not pending:
+            break
+        scheduler.save(completed, pending)
+        scheduler.report(pending)
+        if not scheduler.wait():
+            return False
+
+    scheduler.clear()
+    elapsed = max(time.time() - start - scheduler.waited, 0.001)
+    results = completed[len(skipped) :]
+    log(
+        f"Folder download finished in {elapsed:.2f} seconds |"
+        f" {len(results)}/{len(results) + len(failed)} file(s),"
+        f" {format_size(done_bytes)} @ {format_size(done_bytes / elapsed)}/s"
+    )
+    for r in failed:
+        log(f"Failed: {r['path']}", level="ERROR")
+    return not failed
+
+
 def download_folder(url: str, path: str) -> bool:
     log(f"Starting folder download: {url}")
+    if FOLDER_LINK_RE.match(url):
+        files = list_folder(url)
+        if files:
+            os.makedirs(path, exist_ok=True)
+            return download_folder_parallel(url, path, files)
+        log("Folder listing unavailable, falling back to a single megadl run")
+    os.makedirs(path, exist_ok=True)
+    if not check_disk_space(path, get_remote_size(url, "folder") or 0):
+        return False
+    scheduler = QuotaScheduler(url, path)
     try:
         os.makedirs(path, exist_ok=True)
         cmd = ["megadl", "--path", path, url]
 
+        def show_line(line: str):
+            log(line, "FILE" if output_path in line else "DOWNLOAD")
+
         start = time.time()
-        if show_logs:
-            proc = subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        while True:
+            exit_code, output = run_megadl(
+                cmd, on_line=show_line if show_logs else None
+            )
+            if show_logs:
+                print()  # newline
+            if exit_code == 0 or not is_quota_error(output):
+                break
+            # megadl melewati file yang sudah ada saat dijalankan ulang
+            scheduler.trip(output)
+            scheduler.save([], [{"link": url}])
+            scheduler.report([{"link": url}])
+            if not scheduler.wait():
+                return False
+        if exit_code != 0:
+            raise RuntimeError(
+                output.splitlines()[-1] if output else f"exit {exit_code}"
             )
-            for line in proc.stdout:
-                line = line.strip()
-                if line:
-                    if output_path in line:
-                        log(line, "FILE")
-                    else:
-                        log(line, "DOWNLOAD")
-
-            print()  # newline
-            proc.wait()
-        else:
-            subprocess.run(cmd, check=True, timeout=Config.DEFAULT_TIMEOUT)
 
-        elapsed = time.time() - start
+        scheduler.clear()
+        elapsed = time.time() - start - scheduler.waited
         log(f"Folder download completed in {elapsed:.2f} seconds")
         return True
     except Exception as e:
@@ -137,7 +529,8 @@ def main():
     log(f"Link: {mega_link}")
     log(f"Output Path: {output_path}")
     log(
-        f"Mode: {mega_type.upper()} | Timeout: {timeout_minutes} minutes | Min Space: {min_disk_space_mb}MB"
+        f"Mode: {mega_type.upper()} | Idle timeout: {timeout_minutes} minutes"
+        f" | Disk margin: {disk_safety_margin_pct}% (min {min_disk_space_mb}MB)"
     )
 
     if not validate_url(mega_link):
@@ -145,8 +538,13 @@ def main():
         return
 
     os.makedirs(output_path, exist_ok=True)
-    if not check_disk_space(output_path):
-        return
+    if mega_type == "file":
+        # Folder dicek setelah listing, saat ukuran file yang belum ada diketahui
+        remote_size = get_remote_size(mega_link, "file")
+        if remote_size is not None:
+            log(f"Remote size: {format_size(remote_size)}")
+        if not check_disk_space(output_path, remote_size or 0):
+            return
 
     if not install_megatools():
         return
@@ -91,9 +91,17 @@ output_path, config_path = save_config_to_json(
 import os
 import re
 import json
+import html
+import hashlib
 import subprocess
 import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 def install_dependencies():
@@ -148,6 +156,564 @@ def extract_drive_id(url: str) -> str | None:
     return None
 
 
+def extract_drive_folder_id(url: str) -> str | None:
+    match = re.search(r"drive\.google\.com/drive/(?:u/\d+/)?folders/([^/?#]+)", url)
+    return match.group(1) if match else None
+
+
+DRIVE_DOWNLOAD_URL = "https://drive.google.com/uc"
+DRIVE_CONFIRM_RE = re.compile(r"confirm=([0-9A-Za-z_-]+)")
+DRIVE_FORM_RE = re.compile(r'<form[^>]*id="download-form"[^>]*action="([^"]+)"', re.S)
+DRIVE_INPUT_RE = re.compile(r'<input type="hidden" name="([^"]+)" value="([^"]*)"')
+
+
+def resolve_drive_download(session: requests.Session, drive_id: str) -> str | None:
+    """Direct URL of a Drive file, past the "can't scan for viruses" page of big files"""
+    response = session.get(
+        DRIVE_DOWNLOAD_URL,
+        params={"export": "download", "id": drive_id},
+        stream=True,
+        timeout=30,
+    )
+    with response:
+        if response.status_code != 200:
+            return None
+        if "text/html" not in response.headers.get("Content-Type", ""):
+            return response.url
+        page = response.text
+
+    # Halaman baru: form download-form dengan input tersembunyi (id, confirm, uuid)
+    form = DRIVE_FORM_RE.search(page)
+    if form:
+        fields = dict(DRIVE_INPUT_RE.findall(page))
+        return f"{urljoin(response.url, form.group(1))}?{urlencode(fields)}"
+
+    # Halaman lama: token confirm di link atau cookie download_warning
+    token = DRIVE_CONFIRM_RE.search(page)
+    token = token.group(1) if token else None
+    for cookie in session.cookies:
+        if cookie.name.startswith("download_warning"):
+            token = cookie.value
+    if not token:
+        return None
+    query = urlencode({"export": "download", "confirm": token, "id": drive_id})
+    return f"{DRIVE_DOWNLOAD_URL}?{query}"
+
+
+def probe_ranges(session: requests.Session, url: str) -> tuple[int | None, bool]:
+    """(total size or None, whether the server answers byte-range requests)"""
+    response = session.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=30)
+    response.close()
+    match = re.search(r"/(\d+)$", response.headers.get("Content-Range", ""))
+    if response.status_code == 206 and match:
+        return int(match.group(1)), True
+    # Tanpa range: Content-Length tetap cukup untuk cek file yang sudah lengkap
+    length = response.headers.get("Content-Length", "")
+    if response.status_code == 200 and length.isdigit():
+        return int(length), False
+    return None, False
+
+
+def drive_split_size(total_size: int, connections: int) -> str:
+    """aria2 -k: about four pieces per connection, between 1M and 64M"""
+    piece_mb = total_size // (connections * 4) // (1024 * 1024)
+    return f"{max(1, min(64, piece_mb))}M"
+
+
+def aria2_drive_command(
+    session: requests.Session,
+    url: str,
+    output_file: str,
+    total_size: int,
+    connections: int,
+) -> list:
+    connections = max(1, min(16, connections))
+    cmd = [
+        "aria2c",
+        "-x",
+        str(connections),
+        "-s",
+        str(connections),
+        "-k",
+        drive_split_size(total_size, connections),
+        "--file-allocation=none",
+        "--continue=true",
+        "--max-tries=5",
+        "--retry-wait=3",
+        "--allow-overwrite=true",
+        "--console-log-level=warn",
+        "--summary-interval=5",
+        "-d",
+        os.path.dirname(output_file),
+        "-o",
+        os.path.basename(output_file),
+    ]
+    # Cookie dari halaman konfirmasi dibutuhkan oleh URL download
+    cookies = "; ".join(f"{c.name}={c.value}" for c in session.cookies)
+    if cookies:
+        cmd += ["--header", f"Cookie: {cookies}"]
+    return cmd + [url]
+
+
+DRIVE_FOLDER_URL = "https://drive.google.com/embeddedfolderview"
+DRIVE_TITLE_RE = re.compile(r"<title>(.*?)</title>", re.S)
+DRIVE_ENTRY_RE = re.compile(
+    r'<div class="flip-entry" id="entry-([^"]+)".*?<a href="([^"]+)"'
+    r'.*?<div class="flip-entry-title">(.*?)</div>',
+    re.S,
+)
+
+
+def safe_name(name: str) -> str:
+    return re.sub(r'[\\/:*?"<>|]', "_", html.unescape(name).strip()) or "untitled"
+
+
+def list_drive_folder(
+    session: requests.Session, folder_id: str, rel_dir: str = "", seen: set = None
+) -> tuple[str, list]:
+    """(folder title, [(file_id, relative_path)]) of a public folder, recursively"""
+    seen = seen if seen is not None else set()
+    seen.add(folder_id)
+    response = session.get(DRIVE_FOLDER_URL, params={"id": folder_id}, timeout=30)
+    response.raise_for_status()
+    page = response.text
+    title = DRIVE_TITLE_RE.search(page)
+    title = safe_name(title.group(1)) if title else folder_id
+
+    entries = DRIVE_ENTRY_RE.findall(page)
+    names = [safe_name(name) for _, _, name in entries]
+    files = []
+    for (entry_id, href, _), name in zip(entries, names):
+        # Nama kembar di Drive: id ditambahkan agar tidak menulis file yang sama
+        if names.count(name) > 1:
+            stem, ext = os.path.splitext(name)
+            name = f"{stem}_{entry_id}{ext}"
+        rel_path = os.path.join(rel_dir, name)
+        if "/folders/" in href:
+            # Subfolder: ikuti sekali saja (shortcut bisa membuat siklus)
+            if entry_id not in seen:
+                _, children = list_drive_folder(session, entry_id, rel_path, seen)
+                files.extend(children)
+        else:
+            files.append((entry_id, rel_path))
+    return title, files
+
+
+def fetch_drive_file(
+    session: requests.Session,
+    file_id: str,
+    direct_url: str | None,
+    total_size: int | None,
+    ranged: bool,
+    output_file: str,
+    connections: int,
+    run,
+    quiet: bool,
+) -> bool:
+    """aria2c with ranges when possible, gdown (single stream) otherwise or on failure"""
+    if ranged and command_exists("aria2c"):
+        if not quiet:
+            log(
+                f"Range requests supported ({total_size / (1024 * 1024):.2f} MB),"
+                f" downloading with aria2c x{connections}"
+            )
+        cmd = aria2_drive_command(
+            session, direct_url, output_file, total_size, connections
+        )
+        if (
+            run(cmd) == 0
+            and os.path.exists(output_file)
+            and os.path.getsize(output_file) == total_size
+        ):
+            return True
+        log(
+            f"Ranged download failed for {os.path.basename(output_file)},"
+            " falling back to gdown",
+            "WARNING",
+        )
+        for leftover in (output_file, output_file + ".aria2"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    try:
+        import gdown
+    except ImportError:
+        log("Installing gdown...", "INFO")
+        subprocess.run(["pip", "install", "gdown"], stdout=subprocess.DEVNULL)
+        import gdown
+
+    if not quiet:
+        log("Downloading with gdown (single stream)")
+    gdown.download(id=file_id, output=output_file, quiet=quiet)
+    if not os.path.exists(output_file):
+        return False
+    return total_size is None or os.path.getsize(output_file) == total_size
+
+
+def download_drive_file(
+    file_id: str, output_file: str, connections: int
+) -> tuple[str, int]:
+    """(status, bytes) for one folder file: ok, skipped or failed"""
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    session = requests.Session()
+    direct_url = None
+    try:
+        direct_url = resolve_drive_download(session, file_id)
+        total_size, ranged = (
+            probe_ranges(session, direct_url) if direct_url else (None, False)
+        )
+    except requests.RequestException:
+        total_size, ranged = None, False
+
+    if (
+        total_size
+        and os.path.exists(output_file)
+        and os.path.getsize(output_file) == total_size
+        and not os.path.exists(output_file + ".aria2")
+    ):
+        return "skipped", total_size
+
+    def run_quiet(cmd):
+        return subprocess.run(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ).returncode
+
+    if fetch_drive_file(
+        session,
+        file_id,
+        direct_url,
+        total_size,
+        ranged,
+        output_file,
+        connections,
+        run_quiet,
+        quiet=True,
+    ):
+        return "ok", os.path.getsize(output_file)
+    return "failed", 0
+
+
+def download_drive_folder(
+    folder_id: str, video_dir: str, connections: int, parallel_files: int
+):
+    try:
+        import gdown
+    except ImportError:
+        log("Installing gdown...", "INFO")
+        subprocess.run(["pip", "install", "gdown"], stdout=subprocess.DEVNULL)
+
+    log("Listing Google Drive folder...")
+    title, files = list_drive_folder(requests.Session(), folder_id)
+    folder_path = os.path.join(video_dir, title)
+    print(f"╭📂 Folder     : {title}")
+    print(f"├🧾 Files      : {len(files)}")
+    print(f"├📁 Saving to  : {folder_path}")
+    # Koneksi dibagi antar file agar total tidak membanjiri Drive
+    per_file = max(1, connections // max(1, parallel_files))
+    print(f"╰🧵 Parallel   : {parallel_files} file(s) x {per_file} connection(s)\n")
+    if not files:
+        log("Folder is empty or not shared publicly", "WARNING")
+        return []
+
+    print_lock = threading.Lock()
+
+    def fetch(item):
+        file_id, rel_path = item
+        start = time.time()
+        try:
+            status, size = download_drive_file(
+                file_id, os.path.join(folder_path, rel_path), per_file
+            )
+        except Exception as e:
+            log(f"{rel_path}: {e}", "ERROR")
+            status, size = "failed", 0
+        elapsed = time.time() - start
+        icon = {"ok": "✅", "skipped": "⏭️", "failed": "❌"}[status]
+        with print_lock:
+            print(
+                f"   {icon} {size / (1024 * 1024):>9.2f} MB {elapsed:>7.1f}s  {rel_path}"
+            )
+        return {"path": rel_path, "status": status, "size": size}
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, parallel_files)) as pool:
+        results = list(pool.map(fetch, files))
+    elapsed = time.time() - start
+
+    downloaded = [r for r in results if r["status"] == "ok"]
+    total_mb = sum(r["size"] for r in downloaded) / (1024 * 1024)
+    print(f"\n📊 Folder Summary: {len(downloaded)}/{len(results)} downloaded")
+    print(f"├⏭️ Skipped    : {sum(r['status'] == 'skipped' for r in results)}")
+    print(f"├❌ Failed     : {sum(r['status'] == 'failed' for r in results)}")
+    print(
+        f"╰📦 Total      : {total_mb:.2f} MB in {elapsed:.1f}s"
+        f" ({total_mb / elapsed if elapsed else 0:.2f} MB/s)"
+    )
+    return results
+
+
+HLS_ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class HlsUnsupported(Exception):
+    """Playlist the native engine can't handle; yt-dlp takes over"""
+
+
+def hls_attributes(line: str) -> dict:
+    return {k: v.strip('"') for k, v in HLS_ATTR_RE.findall(line.split(":", 1)[1])}
+
+
+def hls_byterange(value: str, uri: str, next_offset: dict) -> tuple[int, int]:
+    """EXT-X-BYTERANGE length[@offset] -> (start, end); no offset = right after the previous one"""
+    length, _, offset = value.partition("@")
+    start = int(offset) if offset else next_offset.get(uri, 0)
+    next_offset[uri] = start + int(length)
+    return start, start + int(length) - 1
+
+
+def parse_m3u8(text: str, base_url: str) -> dict:
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or lines[0] != "#EXTM3U":
+        raise HlsUnsupported("not an M3U8 playlist")
+
+    playlist = {"variants": [], "audio": {}, "segments": [], "map": None}
+    sequence, duration, key, byterange = 0, 0.0, None, None
+    variant, next_offset = None, {}
+    for line in lines[1:]:
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            variant = hls_attributes(line)
+        elif line.startswith("#EXT-X-MEDIA:"):
+            attrs = hls_attributes(line)
+            if attrs.get("TYPE") == "AUDIO" and attrs.get("URI"):
+                playlist["audio"][attrs.get("GROUP-ID")] = attrs
+        elif line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+            sequence = int(line.split(":", 1)[1])
+        elif line.startswith("#EXT-X-KEY:"):
+            attrs = hls_attributes(line)
+            method = attrs.get("METHOD", "NONE")
+            if method == "NONE":
+                key = None
+            elif method == "AES-128":
+                key = {"uri": urljoin(base_url, attrs["URI"]), "iv": attrs.get("IV")}
+            else:
+                raise HlsUnsupported(f"{method} encryption")
+        elif line.startswith("#EXT-X-MAP:"):
+            attrs = hls_attributes(line)
+            uri = urljoin(base_url, attrs["URI"])
+            playlist["map"] = {
+                "uri": uri,
+                "range": (
+                    hls_byterange(attrs["BYTERANGE"], uri, next_offset)
+                    if attrs.get("BYTERANGE")
+                    else None
+                ),
+            }
+        elif line == "#EXT-X-DISCONTINUITY":
+            # Timestamp/codec bisa berubah di tengah (iklan): tidak bisa di-pipe utuh
+            raise HlsUnsupported("discontinuity in playlist")
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            byterange = line.split(":", 1)[1]
+        elif line.startswith("#EXTINF:"):
+            duration = float(line.split(":", 1)[1].split(",")[0] or 0)
+        elif not line.startswith("#"):
+            uri = urljoin(base_url, line)
+            if variant is not None:
+                playlist["variants"].append({**variant, "uri": uri})
+                variant = None
+                continue
+            playlist["segments"].append(
+                {
+                    "uri": uri,
+                    "sequence": sequence + len(playlist["segments"]),
+                    "duration": duration,
+                    "key": key,
+                    "range": (
+                        hls_byterange(byterange, uri, next_offset)
+                        if byterange
+                        else None
+                    ),
+                }
+            )
+            byterange = None
+    return playlist
+
+
+def decrypt_aes128(data: bytes, key: bytes, iv: bytes) -> bytes:
+    try:
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    except ImportError:
+        log("Installing cryptography...", "INFO")
+        subprocess.run(["pip", "install", "cryptography"], stdout=subprocess.DEVNULL)
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+    plain = decryptor.update(data) + decryptor.finalize()
+    # Buang padding PKCS#7
+    if plain and 1 <= plain[-1] <= 16:
+        plain = plain[: -plain[-1]]
+    return plain
+
+
+class HlsDownloader:
+    """Concurrent HLS segment fetcher that pipes segments in order into ffmpeg"""
+
+    def __init__(self, url: str, work_dir: str, workers: int = 16):
+        self.url = url
+        self.work_dir = work_dir
+        self.workers = max(1, workers)
+        self.keys = {}
+        self.keys_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=self.workers,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, byte_range: tuple = None) -> bytes:
+        headers = (
+            {"Range": f"bytes={byte_range[0]}-{byte_range[1]}"} if byte_range else {}
+        )
+        response = self.session.get(url, headers=headers, timeout=30)
+        response.raise_for_status()
+        return response.content
+
+    def load_playlist(self) -> dict:
+        url = self.url
+        playlist = parse_m3u8(self.get(url).decode("utf-8", "replace"), url)
+        if playlist["variants"]:
+            # Master playlist: ambil varian dengan bandwidth tertinggi
+            best = max(playlist["variants"], key=lambda v: int(v.get("BANDWIDTH", 0)))
+            if best.get("AUDIO") in playlist["audio"]:
+                raise HlsUnsupported("separate audio rendition")
+            log(
+                f"HLS variant: {best.get('RESOLUTION', '?')}"
+                f" @ {int(best.get('BANDWIDTH', 0)) // 1000} kbps"
+            )
+            url = best["uri"]
+            playlist = parse_m3u8(self.get(url).decode("utf-8", "replace"), url)
+        if not playlist["segments"]:
+            raise HlsUnsupported("no media segments")
+        playlist["url"] = url
+        return playlist
+
+    def key_bytes(self, uri: str) -> bytes:
+        with self.keys_lock:
+            if uri not in self.keys:
+                self.keys[uri] = self.get(uri)
+            return self.keys[uri]
+
+    def fetch_segment(self, segment_dir: str, index: int, segment: dict) -> str:
+        path = os.path.join(segment_dir, f"{index:06d}.seg")
+        if os.path.exists(path):
+            return path
+        data = self.get(segment["uri"], segment["range"])
+        key = segment["key"]
+        if key:
+            iv = key["iv"]
+            iv = (
+                bytes.fromhex(iv[2:].zfill(32))
+                if iv
+                else segment["sequence"].to_bytes(16, "big")
+            )
+            data = decrypt_aes128(data, self.key_bytes(key["uri"]), iv)
+        # Tulis ke .part lalu rename: segmen setengah jadi tidak dianggap selesai
+        with open(path + ".part", "wb") as f:
+            f.write(data)
+        os.replace(path + ".part", path)
+        return path
+
+    def download(self, output_file: str):
+        playlist = self.load_playlist()
+        segments = playlist["segments"]
+        # Token di query string berganti tiap sesi: kunci dari host + path segmen
+        identity = "\n".join(
+            f"{urlparse(segment['uri']).netloc}{urlparse(segment['uri']).path}"
+            f" {segment['range']}"
+            for segment in segments
+        )
+        key = hashlib.sha1(identity.encode("utf-8")).hexdigest()[:12]
+        # Segmen selesai tetap di disk: run ulang hanya mengambil yang belum ada
+        segment_dir = os.path.join(self.work_dir, f"hls_{key}")
+        os.makedirs(segment_dir, exist_ok=True)
+        done = sum(
+            os.path.exists(os.path.join(segment_dir, f"{i:06d}.seg"))
+            for i in range(len(segments))
+        )
+        total_duration = sum(s["duration"] for s in segments)
+        print(f"╭🧩 Segments   : {len(segments)} ({total_duration / 60:.1f} min)")
+        print(f"├🔐 Encrypted  : {'AES-128' if segments[0]['key'] else 'No'}")
+        print(f"├♻️ Resumed    : {done} segment(s) already on disk")
+        print(f"╰🧵 Workers    : {self.workers}\n")
+
+        ffmpeg = subprocess.Popen(
+            ["ffmpeg", "-y", "-loglevel", "error", "-i", "pipe:0", "-c", "copy"]
+            + [output_file],
+            stdin=subprocess.PIPE,
+        )
+        window = self.workers * 4
+        futures = {}
+        written = 0
+        broken_pipe = False
+        start = last_report = time.time()
+        try:
+            if playlist["map"]:
+                ffmpeg.stdin.write(
+                    self.get(playlist["map"]["uri"], playlist["map"]["range"])
+                )
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                try:
+                    submitted = 0
+                    for index in range(len(segments)):
+                        # Jendela terbatas: worker tidak jauh mendahului penulis
+                        while submitted < min(len(segments), index + window):
+                            futures[submitted] = pool.submit(
+                                self.fetch_segment,
+                                segment_dir,
+                                submitted,
+                                segments[submitted],
+                            )
+                            submitted += 1
+                        with open(futures.pop(index).result(), "rb") as f:
+                            written += ffmpeg.stdin.write(f.read())
+                        if time.time() - last_report >= 5:
+                            last_report = time.time()
+                            print(
+                                f"[HLS] {index + 1}/{len(segments)} segments"
+                                f" | {written / (1024 * 1024):.1f} MB"
+                                f" | {written / (1024 * 1024) / (last_report - start):.2f} MB/s",
+                                flush=True,
+                            )
+                except BaseException:
+                    for future in futures.values():
+                        future.cancel()
+                    raise
+            ffmpeg.stdin.close()
+        except BrokenPipeError:
+            broken_pipe = True
+        finally:
+            try:
+                if not ffmpeg.stdin.closed:
+                    ffmpeg.stdin.close()
+            except BrokenPipeError:
+                broken_pipe = True
+            ffmpeg.wait()
+        if broken_pipe or ffmpeg.returncode != 0:
+            # Kontainer/codec ditolak ffmpeg: file setengah jadi dibuang, yt-dlp ambil alih
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            raise HlsUnsupported(f"ffmpeg remux failed (exit {ffmpeg.returncode})")
+        log(
+            f"HLS remux done: {written / (1024 * 1024):.2f} MB from {len(segments)} segments"
+        )
+
+
 def command_exists(command):
     return shutil.which(command) is not None
 
@@ -197,6 +763,148 @@ def print_config_summary(config: dict):
     print(f"╰🎞️ Extension     : {config.get('video_ext')}\n")
 
 
+# Salinan blok INFO CACHE dari ytdlp.py: tiap file di-paste sebagai cell Colab
+# mandiri tanpa modul bersama, jadi perubahan harus disamakan di ketiga file
+TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "si", "feature", "ref", "ref_src", "s"}
+HOST_ALIASES = {"x.com": "twitter.com"}
+# Hanya situs ini yang dinormalisasi; URL lain (direct, m3u8, signed) jadi key utuh
+NORMALIZED_HOSTS = {"youtube.com", "youtu.be", "music.youtube.com", "twitter.com"}
+
+
+def normalize_url(url: str) -> str:
+    """Cache key form of a URL: known video sites drop share/tracking params"""
+    url = url.strip()
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+            break
+    host = HOST_ALIASES.get(host, host)
+    if host not in NORMALIZED_HOSTS:
+        return url
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith("utm_")
+    )
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse(("https", host, path, "", urlencode(query), ""))
+
+
+class InfoCache:
+    """On-disk cache of yt-dlp info dicts, one <sha1>.info.json per normalized URL"""
+
+    def __init__(self, cache_dir: str, ttl_minutes: int):
+        self.cache_dir = cache_dir
+        self.ttl = ttl_minutes * 60
+        self.enabled = bool(cache_dir) and ttl_minutes > 0
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0}
+        self.lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, url: str) -> str:
+        key = hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.info.json")
+
+    def count(self, field: str):
+        with self.lock:
+            self.stats[field] += 1
+
+    def get(self, url: str):
+        if not self.enabled:
+            return None
+        path = self.path(url)
+        if not os.path.exists(path):
+            self.count("misses")
+            return None
+        if time.time() - os.path.getmtime(path) > self.ttl:
+            self.count("expired")
+            self.count("misses")
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            self.count("misses")
+            return None
+        self.count("hits")
+        return info
+
+    def put(self, url: str, info: dict):
+        if not self.enabled or not info:
+            return
+        path = self.path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(info, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, url: str):
+        if self.enabled and os.path.exists(self.path(url)):
+            os.remove(self.path(url))
+            self.count("invalidated")
+
+    def save_stats(self):
+        """Accumulate this run's counters into stats.json next to the cache"""
+        if not self.enabled:
+            return
+        stats_path = os.path.join(self.cache_dir, "stats.json")
+        totals = {}
+        if os.path.exists(stats_path):
+            try:
+                with open(stats_path, "r", encoding="utf-8") as f:
+                    totals = json.load(f)
+            except (OSError, ValueError):
+                totals = {}
+        for field, value in self.stats.items():
+            totals[field] = totals.get(field, 0) + value
+        with open(stats_path, "w", encoding="utf-8") as f:
+            json.dump(totals, f, indent=2)
+        self.print_summary(totals)
+
+    def print_summary(self, totals: dict):
+        def rate(stats):
+            lookups = stats.get("hits", 0) + stats.get("misses", 0)
+            return f"{stats.get('hits', 0) * 100 / lookups:.1f}%" if lookups else "-"
+
+        print(
+            f"🗄️ Info cache: {self.stats['hits']} hit(s), {self.stats['misses']} miss(es)"
+            f" ({self.stats['expired']} expired) | hit rate {rate(self.stats)}"
+            f" | all-time {rate(totals)}"
+        )
+
+
+def cached_info_args(cache: InfoCache, url: str) -> tuple:
+    """(yt-dlp CLI source arguments, loaded from cache) for url"""
+    if not cache or not cache.enabled:
+        return [url], False
+    if cache.get(url) is not None:
+        return ["--no-clean-info-json", "--load-info-json", cache.path(url)], True
+    # Miss: proses download ini sendiri menulis info JSON ke cache, tanpa yt-dlp -J
+    info_template = cache.path(url)[: -len(".info.json")]
+    return [
+        "--write-info-json",
+        "--no-write-playlist-metafiles",
+        "-o",
+        f"infojson:{info_template}",
+        url,
+    ], False
+
+
+def run_cached(run, cmd: list, cache: InfoCache, url: str) -> int:
+    """Run a yt-dlp command through the info cache; a stale cached info gets one clean retry"""
+    source_args, from_cache = cached_info_args(cache, url)
+    returncode = run(cmd + source_args)
+    if returncode != 0 and cache:
+        cache.invalidate(url)
+        if from_cache:
+            log("Cached info failed, retrying without the cache", "WARNING")
+            returncode = run(cmd + [url])
+    return returncode
+
+
 def download_video_by_type(
     download_type: str,
     video_url: str,
@@ -204,6 +912,10 @@ def download_video_by_type(
     video_dir: str,
     video_ext: str = "mp4",
     config: dict = None,
+    cache: InfoCache = None,
+    drive_connections: int = 16,
+    drive_parallel_files: int = 3,
+    hls_workers: int = 16,
 ):
     # Install dependencies first
     install_dependencies()
@@ -215,6 +927,7 @@ def download_video_by_type(
         for line in process.stdout:
             print(f"{line.strip()[:150]}", flush=True)
         process.wait()
+        return process.returncode
 
     tool = download_type
     if tool == "auto":
@@ -227,6 +940,16 @@ def download_video_by_type(
 
     log(f"Using download tool: {tool}")
 
+    folder_id = extract_drive_folder_id(video_url) if tool == "google_drive" else None
+    if folder_id:
+        # Folder: struktur dipertahankan di video_dir, tanpa konversi per file
+        if config:
+            print_config_summary(config)
+        download_drive_folder(
+            folder_id, video_dir, drive_connections, drive_parallel_files
+        )
+        return
+
     start = time.time()
 
     temp_path = os.path.join(video_dir, "temp_dl")
@@ -234,13 +957,6 @@ def download_video_by_type(
     temp_output = os.path.join(temp_path, "downloaded_video")
 
     if tool == "google_drive":
-        try:
-            import gdown
-        except ImportError:
-            log("Installing gdown...", "INFO")
-            subprocess.run(["pip", "install", "gdown"], stdout=subprocess.DEVNULL)
-            import gdown
-
         log("Downloading from Google Drive...")
         if config:
             print_config_summary(config)
@@ -248,36 +964,67 @@ def download_video_by_type(
         if not drive_id:
             raise ValueError("[ERROR] Unable to detect Google Drive ID.")
         temp_file = temp_output + ".mp4"
-        gdown.download(
-            f"https://drive.google.com/uc?id={drive_id}", temp_file, quiet=False
-        )
+
+        # Token confirm / URL langsung cukup di-resolve sekali
+        session = requests.Session()
+        direct_url = None
+        try:
+            direct_url = resolve_drive_download(session, drive_id)
+            total_size, ranged = (
+                probe_ranges(session, direct_url) if direct_url else (None, False)
+            )
+        except requests.RequestException as e:
+            log(f"Failed to resolve Drive download URL: {e}", "WARNING")
+            total_size, ranged = None, False
+
+        if not fetch_drive_file(
+            session,
+            drive_id,
+            direct_url,
+            total_size,
+            ranged,
+            temp_file,
+            drive_connections,
+            safe_run,
+            quiet=False,
+        ):
+            # File terpotong/salah ukuran jangan sampai dipindah sebagai hasil
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise RuntimeError("[ERROR] Google Drive download failed or is incomplete.")
 
     elif tool == "m3u8":
-        log("Downloading from M3U8 using yt-dlp + aria2c...")
         if config:
             print_config_summary(config)
-        cmd = [
-            "yt-dlp",
-            "--downloader",
-            "aria2c",
-            "--retries",
-            "5",
-            "--downloader-args",
-            "aria2c:-x 16 -j 32 -s 32 -k 1M",
-            "--merge-output-format",
-            video_ext,
-            "-o",
-            temp_output + ".%(ext)s",
-            video_url,
-        ]
-        safe_run(cmd)
+        try:
+            log("Downloading from M3U8 using native HLS engine...")
+            HlsDownloader(video_url, temp_path, hls_workers).download(
+                temp_output + f".{video_ext}"
+            )
+        except HlsUnsupported as e:
+            # Network error tidak di-fallback: jalankan ulang untuk melanjutkan segmen
+            log(f"Native HLS not possible ({e}), using yt-dlp + aria2c...", "WARNING")
+            cmd = [
+                "yt-dlp",
+                "--downloader",
+                "aria2c",
+                "--retries",
+                "5",
+                "--downloader-args",
+                "aria2c:-x 16 -j 32 -s 32 -k 1M",
+                "--merge-output-format",
+                video_ext,
+                "-o",
+                temp_output + ".%(ext)s",
+            ]
+            run_cached(safe_run, cmd, cache, video_url)
 
     elif tool == "direct":
         log("Downloading from Direct Link using yt-dlp...")
         if config:
             print_config_summary(config)
-        cmd = ["yt-dlp", "-o", temp_output + ".%(ext)s", "--retries", "3", video_url]
-        safe_run(cmd)
+        cmd = ["yt-dlp", "-o", temp_output + ".%(ext)s", "--retries", "3"]
+        run_cached(safe_run, cmd, cache, video_url)
 
     else:
         raise ValueError("[ERROR] Unknown download type!")
@@ -285,7 +1032,7 @@ def download_video_by_type(
     downloaded_file_path = None
     for f in os.listdir(temp_path):
         if f.startswith("downloaded_video") and f.lower().endswith(
-            (".mp4", ".mkv", ".webm", ".ts")
+            (".mp4", ".mkv", ".webm", ".ts", ".flv", ".avi")
         ):
             downloaded_file_path = os.path.join(temp_path, f)
             break
@@ -327,6 +1074,11 @@ def download_video_by_type(
 config_path = (
     "/content/media_toolkit/config/video_config.json"  # @param {type:"string"}
 )
+info_cache_dir = "/content/media_toolkit/cache/ytdlp_info"  # @param {type:"string"}
+info_cache_ttl_min = 120  # @param {type:"integer"}
+drive_connections = 16  # @param {type:"integer"}
+drive_parallel_files = 3  # @param {type:"integer"}
+hls_workers = 16  # @param {type:"integer"}
 config = load_config(config_path)
 
 # Pastikan ekstensi output sesuai dengan keinginan user
@@ -335,11 +1087,19 @@ if not config["output_path"].endswith(f".{config['video_ext']}"):
         os.path.splitext(config["output_path"])[0] + f".{config['video_ext']}"
     )
 
-download_video_by_type(
-    config["download_type"],
-    config["video_url"],
-    config["output_path"],
-    config["video_dir"],
-    config.get("video_ext", "mp4"),
-    config=config,
-)
+info_cache = InfoCache(info_cache_dir, info_cache_ttl_min)
+try:
+    download_video_by_type(
+        config["download_type"],
+        config["video_url"],
+        config["output_path"],
+        config["video_dir"],
+        config.get("video_ext", "mp4"),
+        config=config,
+        cache=info_cache,
+        drive_connections=drive_connections,
+        drive_parallel_files=drive_parallel_files,
+        hls_workers=hls_workers,
+    )
+finally:
+    info_cache.save_stats()
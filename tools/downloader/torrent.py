@@ -1,12 +1,41 @@
 # @title 📥 Torrent Downloader via aria2c
-# @markdown - Enter the magnet link and output directory
+# @markdown - Enter the magnet link(s) and output directory; several magnets can be separated by spaces or listed one per line in a text file
 magnet_link = ""  # @param {type:"string"}
+magnet_list_file = ""  # @param {type:"string"}
 output_dir = ""  # @param {type:"string"}
+# @markdown - Queue limits shared by all torrents in one aria2 instance
+max_active_torrents = 3  # @param {type:"integer", min:1, max:10}
+global_peer_limit = 200  # @param {type:"integer", min:10}
+max_overall_download_limit = "0"  # @param {type:"string"}
+# @markdown - File selection: indices (`1,3-5`), globs (`*E01*`) and size filters (`>500MB`, `<2GB`), comma separated; empty = all files
+file_selection = ""  # @param {type:"string"}
+list_files_only = False  # @param {type:"boolean"}
+# @markdown - Cache for DHT routing table and .torrent metadata (a `/content/drive/...` path survives the session)
+cache_dir = "/content/media_toolkit/torrent_cache"  # @param {type:"string"}
+# @markdown - Fetch the first and last pieces of each video first; with `ffprobe`/`split` steps, ffprobe runs before the file completes
+prioritize_head_tail = False  # @param {type:"boolean"}
+# @markdown - Post-processing per finished file, comma separated: `ffprobe`, `split`, `drive`
+post_process_steps = ""  # @param {type:"string"}
+post_process_workers = 2  # @param {type:"integer", min:1, max:8}
+metadata_folder = "/content/media_toolkit/metadata"  # @param {type:"string"}
+split_target_mb = 1900  # @param {type:"integer", min:50}
+drive_target_folder = "/content/drive/MyDrive/downloads"  # @param {type:"string"}
+rpc_port = 6810  # @param {type:"integer"}
 
+import base64
+import fnmatch
+import json
+import math
 import os
 import re
+import requests
+import secrets
 import subprocess
 import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from IPython.display import Pretty, display
 
 
 # ========== 🔧 Custom Logging ==========
@@ -50,71 +79,770 @@ def ensure_output_dir(path):
         log(f"Output directory already exists: {path}")
 
 
-# ========== 🔄 Download torrent via magnet ==========
-def download_torrent(magnet_link, output_path):
-    log("Starting torrent download via magnet link...")
-    command = [
-        "aria2c",
-        "--enable-color=false",
-        "--dir",
-        output_path,
-        "--seed-time=0",
-        "--summary-interval=1",
-        "--console-log-level=warn",
-        "--max-connection-per-server=16",
-        "--split=16",
-        "--bt-max-peers=80",
-        "--bt-request-peer-speed-limit=0",
-        "--bt-enable-lpd=true",
-        "--bt-save-metadata=true",
-        "--bt-metadata-only=false",
-        magnet_link,
+# ========== 🗄️ Persistent DHT and metadata cache ==========
+DHT_ENTRY_POINT = "dht.transmissionbt.com:6881"
+
+
+def mount_drive(path):
+    if path.startswith("/content/drive") and not os.path.exists(
+        "/content/drive/MyDrive"
+    ):
+        from google.colab import drive
+
+        drive.mount("/content/drive")
+
+
+def ensure_cache_dir(path):
+    mount_drive(path)
+    os.makedirs(os.path.join(path, "metadata"), exist_ok=True)
+    return path
+
+
+def dht_options(cache_path):
+    """Keep the DHT routing table between runs so peers are found without a cold bootstrap"""
+    dht_file = os.path.join(cache_path, "dht.dat")
+    options = [
+        "--enable-dht=true",
+        f"--dht-file-path={dht_file}",
+        f"--dht-file-path6={os.path.join(cache_path, 'dht6.dat')}",
     ]
+    if not os.path.exists(dht_file):
+        options.append(f"--dht-entry-point={DHT_ENTRY_POINT}")
+    else:
+        log(f"Using saved DHT routing table: {dht_file}")
+    return options
 
-    log(f"Running command: {' '.join(command)}")
 
-    try:
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
+class FirstPeerTimer:
+    """Report how long aria2 took to connect to its first peer (CN in the summary line)"""
+
+    def __init__(self, label):
+        self.label = label
+        self.start = time.time()
+        self.elapsed = None
+
+    def feed(self, line):
+        match = re.search(r"\bCN:(\d+)", line)
+        if match:
+            self.update(int(match.group(1)))
+
+    def update(self, connections):
+        if self.elapsed is None and connections > 0:
+            self.elapsed = time.time() - self.start
+            log(f"Time to first peer ({self.label}): {self.elapsed:.1f}s")
+
+
+# ========== 🧲 Fetch metadata only ==========
+def magnet_info_hash(magnet_link):
+    match = re.search(r"xt=urn:btih:([0-9a-zA-Z]+)", magnet_link)
+    if not match:
+        raise ValueError("Magnet link has no btih info hash.")
+    info_hash = match.group(1)
+    if len(info_hash) == 32:
+        # Info hash base32 -> hex, sesuai nama file .torrent yang disimpan aria2
+        info_hash = base64.b32decode(info_hash.upper()).hex()
+    return info_hash.lower()
+
+
+def fetch_torrent_file(url, metadata_dir):
+    """Save a .torrent given by URL so its file list can be read before downloading"""
+    os.makedirs(metadata_dir, exist_ok=True)
+    name = re.sub(r"[^\w.-]", "_", os.path.basename(url.split("?")[0])) or "download"
+    torrent_path = os.path.join(metadata_dir, name)
+    if not torrent_path.endswith(".torrent"):
+        torrent_path += ".torrent"
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    with open(torrent_path, "wb") as f:
+        f.write(response.content)
+    return torrent_path
+
+
+def load_sources(magnet_text, list_file):
+    sources = magnet_text.split()
+    if list_file:
+        with open(list_file, "r", encoding="utf-8") as f:
+            sources += [
+                line.strip() for line in f if line.strip() and not line.startswith("#")
+            ]
+    # Urutan dipertahankan, duplikat dibuang
+    return list(dict.fromkeys(sources))
+
+
+# ========== 📋 List and select files ==========
+def list_torrent_files(torrent_path):
+    """[(index, path, size_bytes)] parsed from aria2c --show-files"""
+    result = subprocess.run(
+        ["aria2c", "--show-files=true", torrent_path], capture_output=True, text=True
+    )
+    files = []
+    for line in result.stdout.splitlines():
+        index_match = re.match(r"^\s*(\d+)\|(.+)$", line)
+        size_match = re.match(r"^\s*\|.*\(([\d,]+)\)\s*$", line)
+        if index_match:
+            files.append([int(index_match.group(1)), index_match.group(2)[2:], 0])
+        elif size_match and files:
+            files[-1][2] = int(size_match.group(1).replace(",", ""))
+    return [tuple(f) for f in files]
+
+
+SIZE_FILTER_RE = re.compile(r"^([<>])\s*([\d.]+)\s*([KMGT]?)B?$", re.IGNORECASE)
+
+
+def format_size(num_bytes):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if num_bytes < 1024:
+            return f"{num_bytes:.2f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.2f} TB"
+
+
+def select_files(files, selection):
+    """Indices to download: index/glob tokens are unioned, size filters narrow the result"""
+    tokens = [t.strip() for t in selection.split(",") if t.strip()]
+    valid = {index for index, _, _ in files}
+    picks, size_filters, pick_tokens = set(), [], 0
+    for token in tokens:
+        size_match = SIZE_FILTER_RE.match(token)
+        range_match = re.match(r"^(\d+)(?:-(\d+))?$", token)
+        if size_match:
+            op, number, unit = size_match.groups()
+            limit = float(number) * 1024 ** "BKMGT".index(unit.upper() or "B")
+            size_filters.append((op, limit))
+            continue
+        pick_tokens += 1
+        if range_match:
+            start = int(range_match.group(1))
+            end = int(range_match.group(2) or start)
+            matched = set(range(start, end + 1)) & valid
+            if len(matched) < end - start + 1:
+                log(
+                    f"Selection '{token}': indices outside 1-{len(files)} ignored",
+                    level="WARNING",
+                )
+        else:
+            matched = {
+                index
+                for index, path, _ in files
+                if fnmatch.fnmatch(path, token)
+                or fnmatch.fnmatch(os.path.basename(path), token)
+            }
+            if not matched:
+                log(f"Selection '{token}' matches no file", level="WARNING")
+        picks.update(matched)
+
+    # Semua file hanya jika tidak ada token index/glob sama sekali
+    selected = picks if pick_tokens else valid
+    for op, limit in size_filters:
+        selected = {
+            index
+            for index, _, size in files
+            if index in selected and (size > limit if op == ">" else size < limit)
+        }
+    return sorted(selected)
+
+
+def print_file_table(files, selected):
+    print("\n📋 Torrent files:")
+    for index, path, size in files:
+        mark = "✅" if index in selected else "  "
+        print(f"  {mark} {index:>4} | {format_size(size):>11} | {path}")
+    total = sum(size for index, _, size in files if index in selected)
+    print(f"╰📦 Selected {len(selected)}/{len(files)} file(s), {format_size(total)}\n")
+
+
+# ========== 🔌 aria2 JSON-RPC ==========
+# Salinan sengaja dari aria2c.py: tiap sel Colab harus bisa jalan sendiri.
+# Perubahan RPC/post-processing di sana perlu disalin ke sini juga.
+class Aria2RPCError(RuntimeError):
+    pass
+
+
+class Aria2RPC:
+    """Minimal JSON-RPC client for the aria2c process started by this cell"""
+
+    def __init__(self, port):
+        self.url = f"http://127.0.0.1:{port}/jsonrpc"
+        self.secret = secrets.token_hex(16)
+
+    def call(self, method, *params):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": uuid.uuid4().hex,
+            "method": f"aria2.{method}",
+            "params": [f"token:{self.secret}", *params],
+        }
+        response = requests.post(self.url, json=payload, timeout=10)
+        data = response.json()
+        if "error" in data:
+            raise Aria2RPCError(data["error"].get("message", "unknown RPC error"))
+        return data["result"]
+
+    def wait_ready(self, process, timeout=15):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if process.poll() is not None:
+                raise Aria2RPCError("aria2c exited before RPC became available")
+            try:
+                return self.call("getVersion")
+            except (requests.RequestException, ValueError):
+                time.sleep(0.3)
+        raise Aria2RPCError("aria2 RPC did not start in time")
+
+
+def add_torrent(rpc, torrent_path, options):
+    if os.path.exists(torrent_path):
+        with open(torrent_path, "rb") as f:
+            encoded = base64.b64encode(f.read()).decode()
+        return rpc.call("addTorrent", encoded, [], options)
+    return rpc.call("addUri", [torrent_path], options)
+
+
+# ========== 🪝 Post-processing ==========
+VIDEO_EXTS = (".mp4", ".mkv", ".webm", ".mov", ".avi", ".ts", ".flv")
+HEAD_TAIL_BYTES = 1024 * 1024  # sama dengan default --bt-prioritize-piece
+
+
+def ensure_ffmpeg():
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        log("ffmpeg not found. Installing ffmpeg...")
+        subprocess.run(
+            ["apt-get", "install", "-y", "ffmpeg"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
         )
 
-        current_filename = None
 
-        for line in process.stdout:
-            line = line.strip()
-            if not line:
+def run_ffprobe(file_path):
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "quiet",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            file_path,
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.strip()}")
+    return json.loads(result.stdout)
+
+
+def step_ffprobe(file_path, settings):
+    metadata = run_ffprobe(file_path)
+    metadata["input_video_path"] = file_path
+    os.makedirs(settings["metadata_folder"], exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    json_path = os.path.join(settings["metadata_folder"], f"{base_name}.json")
+    with open(json_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    return f"metadata -> {json_path}"
+
+
+def step_split(file_path, settings):
+    target_bytes = settings["split_target_mb"] * 1024 * 1024
+    size = os.path.getsize(file_path)
+    if size <= target_bytes:
+        return "under split target, kept whole"
+
+    duration = float(run_ffprobe(file_path)["format"]["duration"])
+    # Sisakan 5% karena segment hanya bisa dipotong di keyframe
+    segment_time = max(1, int(duration * target_bytes / size * 0.95))
+    base_name, ext = os.path.splitext(os.path.basename(file_path))
+    parts_dir = os.path.join(os.path.dirname(file_path), f"{base_name}_parts")
+    os.makedirs(parts_dir, exist_ok=True)
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-v",
+            "error",
+            "-i",
+            file_path,
+            "-map",
+            "0",
+            "-c",
+            "copy",
+            "-f",
+            "segment",
+            "-segment_time",
+            str(segment_time),
+            "-reset_timestamps",
+            "1",
+            os.path.join(parts_dir, f"{base_name}_part%03d{ext}"),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg split failed: {result.stderr.strip()[-300:]}")
+    return f"{len(os.listdir(parts_dir))} part(s) -> {parts_dir}"
+
+
+def step_copy_to_drive(file_path, settings):
+    dest_dir = settings["drive_target_folder"]
+    os.makedirs(dest_dir, exist_ok=True)
+    name_only, ext = os.path.splitext(os.path.basename(file_path))
+    dest_path = os.path.join(dest_dir, os.path.basename(file_path))
+    counter = 1
+    while os.path.exists(dest_path):
+        dest_path = os.path.join(dest_dir, f"{name_only}_{counter}{ext}")
+        counter += 1
+    shutil.copy(file_path, dest_path)
+    return f"copied -> {dest_path}"
+
+
+POST_PROCESS_STEPS = {
+    "ffprobe": step_ffprobe,
+    "split": step_split,
+    "drive": step_copy_to_drive,
+}
+
+
+def early_probe(file_path, length, settings):
+    """ffprobe a file whose head and tail pieces are in, while the middle still downloads"""
+    metadata = run_ffprobe(file_path)
+    duration = float(metadata.get("format", {}).get("duration") or 0)
+    video = next(
+        (st for st in metadata.get("streams", []) if st.get("codec_type") == "video"),
+        {},
+    )
+    parts = math.ceil(length / (settings["split_target_mb"] * 1024 * 1024))
+    hours, rest = divmod(int(duration), 3600)
+    log(
+        f"Early probe {os.path.basename(file_path)}: {hours:02}:{rest // 60:02}:{rest % 60:02}"
+        f" | {video.get('width', '?')}x{video.get('height', '?')} {video.get('codec_name', '?')}"
+        f" | split plan: {parts} part(s) of <= {settings['split_target_mb']}MB"
+    )
+    return metadata
+
+
+class PostProcessQueue:
+    """Run configured steps for each finished file while other files keep downloading"""
+
+    def __init__(self, steps, workers, settings, probe_early=False):
+        unknown = [step for step in steps if step not in POST_PROCESS_STEPS]
+        if unknown:
+            raise ValueError(f"Unknown post-processing step(s): {', '.join(unknown)}")
+        self.steps = steps
+        self.settings = settings
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.futures = []
+        # Early probe hanya berguna bila hasil ffprobe/split memang dipakai
+        needs_ffmpeg = bool({"ffprobe", "split"} & set(steps))
+        self.probe_early = probe_early and needs_ffmpeg
+        if needs_ffmpeg:
+            ensure_ffmpeg()
+        if "drive" in steps:
+            mount_drive(settings["drive_target_folder"])
+
+    def submit(self, file_path):
+        log(f"Queued post-processing for {os.path.basename(file_path)}")
+        self.futures.append(self.pool.submit(self.process, file_path))
+
+    def submit_early_probe(self, file_path, length):
+        self.pool.submit(self.run_early_probe, file_path, length)
+
+    def run_early_probe(self, file_path, length):
+        try:
+            early_probe(file_path, length, self.settings)
+        except Exception as e:
+            log(f"Early probe {os.path.basename(file_path)}: {e}", level="WARNING")
+
+    def process(self, file_path):
+        record = {"file": os.path.basename(file_path), "steps": []}
+        is_video = file_path.lower().endswith(VIDEO_EXTS)
+        for step in self.steps:
+            if step in ("ffprobe", "split") and not is_video:
+                record["steps"].append((step, "skipped", "not a video", 0.0))
                 continue
+            start = time.time()
+            try:
+                detail = POST_PROCESS_STEPS[step](file_path, self.settings)
+                status = "ok"
+            except Exception as e:
+                detail, status = str(e), "failed"
+            record["steps"].append((step, status, detail, time.time() - start))
+            log(
+                f"[{step}] {record['file']}: {detail}",
+                "ERROR" if status != "ok" else "INFO",
+            )
+            if status != "ok":
+                break
+        return record
 
-            if line.startswith("FILE:"):
-                file_info = line.split("FILE:", 1)[1].strip()
+    def wait(self):
+        if not self.futures:
+            self.pool.shutdown()
+            return []
+        log("Waiting for post-processing to finish...")
+        records = [future.result() for future in self.futures]
+        self.pool.shutdown()
+        print("\n🪝 Post-processing Summary")
+        for record in records:
+            print(f"╭📄 {record['file']}")
+            for i, (step, status, detail, elapsed) in enumerate(record["steps"]):
+                branch = "╰" if i == len(record["steps"]) - 1 else "├"
+                print(f"{branch} {step:<8} {status:<7} {elapsed:>6.1f}s  {detail}")
+        return records
 
-                if "/" in file_info:
-                    file_info = file_info.split("/")[-1]
 
-                words = re.split(r"[.\s]", file_info)
-                short_name = ".".join(words[:3])
+def create_post_process_queue(steps_text, workers, settings, probe_early=False):
+    steps = [step.strip().lower() for step in steps_text.split(",") if step.strip()]
+    if steps:
+        log(f"Post-processing enabled: {' -> '.join(steps)}")
+    return PostProcessQueue(steps, workers, settings, probe_early)
 
-                current_filename = short_name
 
-            elif line.startswith("[#"):
-                if current_filename:
-                    log(f"{current_filename}: {line}")
+# ========== 🧩 Piece tracking ==========
+def piece_has(bitfield, index):
+    byte = index // 8
+    if byte * 2 >= len(bitfield):
+        return False
+    return bool(int(bitfield[byte * 2 : byte * 2 + 2], 16) & (0x80 >> (index % 8)))
 
-        process.wait()
-        if process.returncode == 0:
-            log("Download completed successfully.")
+
+def file_piece_ranges(files, piece_length):
+    """{file index: (head pieces, tail pieces)} from the byte layout of all files"""
+    ranges, offset = {}, 0
+    for f in files:
+        length = int(f["length"])
+        if length:
+            head_end = offset + min(HEAD_TAIL_BYTES, length) - 1
+            tail_start = offset + max(length - HEAD_TAIL_BYTES, 0)
+            ranges[f["index"]] = (
+                range(offset // piece_length, head_end // piece_length + 1),
+                range(
+                    tail_start // piece_length,
+                    (offset + length - 1) // piece_length + 1,
+                ),
+            )
+        offset += length
+    return ranges
+
+
+class TorrentFileTracker:
+    """Fire an early ffprobe when head+tail pieces land and post-processing when a file completes"""
+
+    def __init__(self, hooks):
+        self.hooks = hooks
+        self.probed = set()
+        self.completed = set()
+        self.ranges = None
+
+    def update(self, status):
+        files = [f for f in status.get("files", []) if f.get("selected") == "true"]
+        if self.ranges is None and status.get("pieceLength"):
+            self.ranges = file_piece_ranges(
+                status.get("files", []), int(status["pieceLength"])
+            )
+        bitfield = status.get("bitfield", "")
+        for f in files:
+            path, length = f["path"], int(f["length"])
+            if not path or not length:
+                continue
+            if f["index"] not in self.completed and int(f["completedLength"]) >= length:
+                self.completed.add(f["index"])
+                log(f"File completed: {path}")
+                if self.hooks.steps:
+                    self.hooks.submit(path)
+            elif (
+                self.hooks.probe_early
+                and f["index"] not in self.probed
+                and f["index"] not in self.completed
+                and path.lower().endswith(VIDEO_EXTS)
+                and self.ranges
+                and all(
+                    piece_has(bitfield, i)
+                    for pieces in self.ranges[f["index"]]
+                    for i in pieces
+                )
+            ):
+                self.probed.add(f["index"])
+                self.hooks.submit_early_probe(path, length)
+
+
+# ========== 🔄 Torrent queue ==========
+STATUS_KEYS = [
+    "status",
+    "totalLength",
+    "completedLength",
+    "downloadSpeed",
+    "connections",
+    "numSeeders",
+    "pieceLength",
+    "bitfield",
+    "files",
+    "errorMessage",
+]
+
+
+class TorrentJob:
+    """One magnet/.torrent in the queue: metadata phase, then the selected files"""
+
+    def __init__(self, number, source):
+        self.number = number
+        self.source = source
+        dn = re.search(r"[?&]dn=([^&]+)", source)
+        self.name = requests.utils.unquote(dn.group(1)) if dn else source[-60:]
+        self.phase = "queued"
+        self.gid = None
+        self.status = {}
+        self.timer = None
+        self.tracker = None
+        self.start = None
+        self.elapsed = 0.0
+        self.message = ""
+
+
+class TorrentQueue:
+    """Run many torrents under one aria2c; aria2 itself caps the active count"""
+
+    def __init__(self, rpc, output_path, metadata_dir, selection, hooks, list_only):
+        self.rpc = rpc
+        self.output_path = output_path
+        self.metadata_dir = metadata_dir
+        self.selection = selection
+        self.hooks = hooks
+        self.list_only = list_only
+        self.jobs = []
+        self.handle = None
+
+    def add(self, source):
+        job = TorrentJob(len(self.jobs) + 1, source)
+        self.jobs.append(job)
+        try:
+            if source.startswith("magnet:"):
+                torrent_path = os.path.join(
+                    self.metadata_dir, f"{magnet_info_hash(source)}.torrent"
+                )
+                if os.path.exists(torrent_path):
+                    log(f"Using saved metadata: {torrent_path}")
+                    self.begin_download(job, torrent_path)
+                else:
+                    job.gid = self.rpc.call(
+                        "addUri",
+                        [source],
+                        {
+                            "dir": self.metadata_dir,
+                            "bt-metadata-only": "true",
+                            "bt-save-metadata": "true",
+                        },
+                    )
+                    job.phase = "metadata"
+                    job.timer = FirstPeerTimer(f"metadata #{job.number}")
+            elif source.startswith(("http://", "https://")):
+                self.begin_download(job, fetch_torrent_file(source, self.metadata_dir))
+            else:
+                self.begin_download(job, source)
+        except Exception as e:
+            job.phase, job.message = "error", str(e)
+            log(f"#{job.number} {job.name}: {e}", level="ERROR")
+
+    def begin_download(self, job, torrent_path):
+        files = list_torrent_files(torrent_path)
+        if files:
+            job.name = files[0][1].split("/")[0]
+        selected = select_files(files, self.selection)
+        print(f"\n#{job.number} {job.name}")
+        print_file_table(files, selected)
+        if self.list_only:
+            job.phase = "listed"
+            return
+        if not selected:
+            job.phase, job.message = "skipped", "no files match the selection"
+            return
+        options = {"dir": self.output_path}
+        # Semua file terpilih: tanpa --select-file
+        if len(selected) < len(files):
+            options["select-file"] = ",".join(map(str, selected))
+        if prioritize_head_tail:
+            options["bt-prioritize-piece"] = "head,tail"
+        job.gid = add_torrent(self.rpc, torrent_path, options)
+        job.phase = "download"
+        job.timer = FirstPeerTimer(f"#{job.number} {job.name}")
+        job.tracker = TorrentFileTracker(self.hooks)
+        job.start = time.time()
+
+    def poll(self, job):
+        status = self.rpc.call("tellStatus", job.gid, STATUS_KEYS)
+        job.status = status
+        job.timer.update(int(status.get("connections", 0)))
+        if job.phase == "download":
+            job.tracker.update(status)
+            job.elapsed = time.time() - job.start
+        if status["status"] in ("error", "removed"):
+            job.phase = "error"
+            job.message = status.get("errorMessage", status["status"])
+            log(f"#{job.number} {job.name}: {job.message}", level="ERROR")
+        elif status["status"] == "complete":
+            self.rpc.call("removeDownloadResult", job.gid)
+            if job.phase == "metadata":
+                torrent_path = os.path.join(
+                    self.metadata_dir, f"{magnet_info_hash(job.source)}.torrent"
+                )
+                self.begin_download(job, torrent_path)
+            else:
+                job.phase = "done"
+                log(f"#{job.number} {job.name}: download completed successfully.")
+
+    def run(self):
+        while any(job.phase in ("metadata", "download") for job in self.jobs):
+            for job in self.jobs:
+                if job.phase in ("metadata", "download"):
+                    # .torrent rusak atau OSError cukup menggagalkan job ini
+                    try:
+                        self.poll(job)
+                    except Exception as e:
+                        job.phase, job.message = "error", str(e)
+                        log(f"#{job.number} {job.name}: {e}", level="ERROR")
+            self.render()
+            time.sleep(1)
+        self.render()
+
+    def render(self):
+        lines = []
+        icons = {
+            "queued": "⏳",
+            "metadata": "🧲",
+            "download": "📥",
+            "done": "✅",
+            "error": "❌",
+            "skipped": "⏭️",
+            "listed": "📋",
+        }
+        for job in self.jobs:
+            status = job.status
+            total = int(status.get("totalLength", 0))
+            done = int(status.get("completedLength", 0))
+            percent = f"{done * 100 / total:.1f}%" if total else "?%"
+            line = f"{icons[job.phase]} #{job.number} {job.name} | {job.phase}"
+            if job.phase in ("download", "done"):
+                line += (
+                    f" | {format_size(done)}/{format_size(total)} ({percent})"
+                    f" | DL {format_size(int(status.get('downloadSpeed', 0)))}/s"
+                    f" | CN {status.get('connections', 0)}"
+                )
+            elif job.message:
+                line += f" | {job.message}"
+            lines.append(line)
+            if job.phase != "download":
+                continue
+            files = [f for f in status.get("files", []) if f.get("selected") == "true"]
+            for i, f in enumerate(files):
+                length = int(f["length"])
+                completed = int(f["completedLength"])
+                branch = "╰" if i == len(files) - 1 else "├"
+                name = (
+                    os.path.relpath(f["path"], self.output_path) if f["path"] else "?"
+                )
+                mark = "✅" if length and completed >= length else "  "
+                lines.append(
+                    f"   {branch}{mark} {name} | {format_size(completed)}/{format_size(length)}"
+                )
+        text = "\n".join(lines)
+        if self.handle is None:
+            self.handle = display(Pretty(text), display_id=True)
         else:
-            log(f"aria2c exited with error code: {process.returncode}", level="ERROR")
+            self.handle.update(Pretty(text))
+
+    def print_summary(self):
+        print("\n📊 Torrent Queue Summary")
+        for job in self.jobs:
+            total = int(job.status.get("completedLength", 0))
+            first_peer = job.timer.elapsed if job.timer else None
+            print(
+                f"  #{job.number:<3} {job.phase:<8} {format_size(total):>11}"
+                f" {job.elapsed:>7.1f}s"
+                f"  first peer {f'{first_peer:.1f}s' if first_peer is not None else '-':>7}"
+                f"  {job.name}"
+            )
 
+
+def run_torrent_queue(sources, output_path, selection, extra_options=None, hooks=None):
+    log(f"Starting torrent queue: {len(sources)} torrent(s)")
+    rpc = Aria2RPC(rpc_port)
+    # Batas peer global dibagi rata ke torrent yang aktif bersamaan
+    peers_per_torrent = max(global_peer_limit // max_active_torrents, 10)
+    command = [
+        "aria2c",
+        "--enable-color=false",
+        "--enable-rpc=true",
+        f"--rpc-listen-port={rpc_port}",
+        f"--rpc-secret={rpc.secret}",
+        "--rpc-listen-all=false",
+        "--seed-time=0",
+        "--summary-interval=0",
+        "--console-log-level=warn",
+        "--max-connection-per-server=16",
+        "--split=16",
+        f"--max-concurrent-downloads={max_active_torrents}",
+        f"--max-overall-download-limit={max_overall_download_limit}",
+        f"--bt-max-peers={peers_per_torrent}",
+        "--bt-request-peer-speed-limit=0",
+        "--bt-enable-lpd=true",
+        # File yang sudah ada diverifikasi per piece, bukan dibatalkan
+        "--check-integrity=true",
+        *(extra_options or []),
+    ]
+
+    log(f"Running command: {' '.join(c for c in command if 'secret' not in c)}")
+
+    process = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
+    )
+    queue = TorrentQueue(
+        rpc,
+        output_path,
+        os.path.join(cache_dir, "metadata"),
+        selection,
+        hooks,
+        list_files_only,
+    )
+    try:
+        rpc.wait_ready(process)
+        for source in sources:
+            queue.add(source)
+        queue.run()
     except Exception as e:
         log(f"An error occurred while running aria2c: {e}", level="ERROR")
+    finally:
+        try:
+            rpc.call("forceShutdown")
+        except Exception:
+            process.terminate()
+        process.wait()
+    if not list_files_only:
+        queue.print_summary()
+    return queue
 
 
 # ========== 🚀 Execute ==========
 remove_sample_data()
 ensure_aria2_installed()
 ensure_output_dir(output_dir)
-download_torrent(magnet_link, output_dir)
+ensure_cache_dir(cache_dir)
+sources = load_sources(magnet_link, magnet_list_file)
+hooks = create_post_process_queue(
+    post_process_steps if not list_files_only else "",
+    post_process_workers,
+    {
+        "metadata_folder": metadata_folder,
+        "split_target_mb": split_target_mb,
+        "drive_target_folder": drive_target_folder,
+    },
+    probe_early=prioritize_head_tail and not list_files_only,
+)
+try:
+    run_torrent_queue(
+        sources, output_dir, file_selection, dht_options(cache_dir), hooks
+    )
+finally:
+    hooks.wait()
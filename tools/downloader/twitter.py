@@ -52,15 +52,26 @@ cookies_path = process_uploaded_cookies(uploaded_files)
 
 # @title 🎞️ Download Twitter Video
 # @markdown - Input tweet URL (single/multiple videos)
+# @markdown - Several tweets: separate URLs with spaces or list them in a text file
 tweet_url = ""  # @param {type: "string"}
+tweet_list_file = ""  # @param {type: "string"}
 video_dir = ""  # @param {type: "string"}
+max_parallel_tweets = 3  # @param {type: "integer"}
+max_rate_limit_retries = 5  # @param {type: "integer"}
+info_cache_dir = "/content/media_toolkit/cache/ytdlp_info"  # @param {type: "string"}
+info_cache_ttl_min = 120  # @param {type: "integer"}
 
 import os
 import re
 import json
+import hashlib
 import subprocess
+import threading
 import time
+import random
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 from tqdm import tqdm
 
 
@@ -95,127 +106,425 @@ def format_duration(seconds: float | int | str) -> str:
         return "?"
 
 
-def download_tweet_video(
-    tweet_url: str, video_dir: str, cookies_path: str = "cookies.txt"
+# Salinan blok INFO CACHE dari ytdlp.py: tiap file di-paste sebagai cell Colab
+# mandiri tanpa modul bersama, jadi perubahan harus disamakan di ketiga file
+TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "si", "feature", "ref", "ref_src", "s"}
+HOST_ALIASES = {"x.com": "twitter.com"}
+# Hanya situs ini yang dinormalisasi; URL lain (direct, m3u8, signed) jadi key utuh
+NORMALIZED_HOSTS = {"youtube.com", "youtu.be", "music.youtube.com", "twitter.com"}
+
+
+def normalize_url(url: str) -> str:
+    """Cache key form of a URL: known video sites drop share/tracking params"""
+    url = url.strip()
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+            break
+    host = HOST_ALIASES.get(host, host)
+    if host not in NORMALIZED_HOSTS:
+        return url
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith("utm_")
+    )
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse(("https", host, path, "", urlencode(query), ""))
+
+
+class InfoCache:
+    """On-disk cache of yt-dlp info dicts, one <sha1>.info.json per normalized URL"""
+
+    def __init__(self, cache_dir: str, ttl_minutes: int):
+        self.cache_dir = cache_dir
+        self.ttl = ttl_minutes * 60
+        self.enabled = bool(cache_dir) and ttl_minutes > 0
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0}
+        self.lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, url: str) -> str:
+        key = hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.info.json")
+
+    def count(self, field: str):
+        with self.lock:
+            self.stats[field] += 1
+
+    def get(self, url: str):
+        if not self.enabled:
+            return None
+        path = self.path(url)
+        if not os.path.exists(path):
+            self.count("misses")
+            return None
+        if time.time() - os.path.getmtime(path) > self.ttl:
+            self.count("expired")
+            self.count("misses")
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            self.count("misses")
+            return None
+        self.count("hits")
+        return info
+
+    def put(self, url: str, info: dict):
+        if not self.enabled or not info:
+            return
+        path = self.path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(info, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, url: str):
+        if self.enabled and os.path.exists(self.path(url)):
+            os.remove(self.path(url))
+            self.count("invalidated")
+
+    def save_stats(self):
+        """Accumulate this run's counters into stats.json next to the cache"""
+        if not self.enabled:
+            return
+        stats_path = os.path.join(self.cache_dir, "stats.json")
+        totals = {}
+        if os.path.exists(stats_path):
+            try:
+                with open(stats_path, "r", encoding="utf-8") as f:
+                    totals = json.load(f)
+            except (OSError, ValueError):
+                totals = {}
+        for field, value in self.stats.items():
+            totals[field] = totals.get(field, 0) + value
+        with open(stats_path, "w", encoding="utf-8") as f:
+            json.dump(totals, f, indent=2)
+        self.print_summary(totals)
+
+    def print_summary(self, totals: dict):
+        def rate(stats):
+            lookups = stats.get("hits", 0) + stats.get("misses", 0)
+            return f"{stats.get('hits', 0) * 100 / lookups:.1f}%" if lookups else "-"
+
+        print(
+            f"🗄️ Info cache: {self.stats['hits']} hit(s), {self.stats['misses']} miss(es)"
+            f" ({self.stats['expired']} expired) | hit rate {rate(self.stats)}"
+            f" | all-time {rate(totals)}"
+        )
+
+
+def extract_with_cache(ydl, cache: InfoCache, url: str):
+    """Download url, reusing a cached info dict instead of re-extracting the tweet"""
+    import yt_dlp
+
+    cached = cache.get(url) if cache else None
+    if cached is not None:
+        try:
+            return ydl.process_ie_result(cached, download=True)
+        except yt_dlp.utils.DownloadError as e:
+            if rate_limit_wait(e) is not None:
+                raise
+            # URL video biasanya sudah kedaluwarsa: ekstrak ulang dari tweet
+            log(f"Cached info failed ({e}), extracting again", "WARNING")
+            cache.invalidate(url)
+
+    info = ydl.extract_info(url, download=False, process=False)
+    # Tweet multi-video: entries berupa list biasa, aman disimpan
+    if (
+        cache
+        and info
+        and (
+            info.get("_type", "video") == "video"
+            or isinstance(info.get("entries"), list)
+        )
+    ):
+        cache.put(url, ydl.sanitize_info(dict(info)))
+    return ydl.process_ie_result(info, download=True)
+
+
+RATE_LIMIT_RE = re.compile(r"HTTP Error 429|Too Many Requests|rate.?limit", re.I)
+
+
+def rate_limit_wait(error):
+    """Seconds the server asked us to wait (0 = unknown), None if not a rate limit"""
+    if not RATE_LIMIT_RE.search(str(error)):
+        return None
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            if headers.get("Retry-After"):
+                return max(0.0, float(headers["Retry-After"]))
+            # API Twitter: epoch saat kuota guest/user direset
+            if headers.get("x-rate-limit-reset"):
+                return max(0.0, float(headers["x-rate-limit-reset"]) - time.time())
+        except ValueError:
+            pass
+        exc_info = getattr(error, "exc_info", None)
+        error = (
+            getattr(error, "cause", None)
+            or (exc_info[1] if exc_info else None)
+            or error.__cause__
+        )
+    return 0.0
+
+
+class RateLimitGate:
+    """Backoff shared by every worker: a 429 on one tweet pauses the whole session"""
+
+    def __init__(self, base_delay: int = 15, max_delay: int = 900):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.strikes = 0
+        self.resume_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self.lock:
+                remaining = self.resume_at - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 5))
+
+    def trip(self, server_wait: float = 0):
+        with self.lock:
+            # Worker lain yang kena 429 saat jeda masih berjalan tidak menambah strike
+            if time.time() < self.resume_at:
+                return
+            self.strikes += 1
+            delay = server_wait or min(
+                self.base_delay * 2 ** (self.strikes - 1), self.max_delay
+            )
+            delay += random.uniform(0, delay * 0.2)
+            self.resume_at = time.time() + delay
+        log(f"Rate limited, pausing all workers for {delay:.0f}s", "WARNING")
+
+    def success(self):
+        with self.lock:
+            self.strikes = 0
+
+
+def create_ydl(video_dir: str, cookies_path: str = None, cookiejar=None):
+    import yt_dlp
+
+    options = {
+        "format": "best",
+        "outtmpl": os.path.join(video_dir, "%(id)s.%(ext)s"),
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+    }
+    if cookies_path:
+        options["cookiefile"] = cookies_path
+    ydl = yt_dlp.YoutubeDL(options)
+    if cookiejar is not None:
+        # Pakai cookie jar sesi bersama, bukan salinan dari cookies.txt
+        ydl.cookiejar = cookiejar
+    return ydl
+
+
+def attach_manifest(ydl) -> list:
+    """Collect (filepath, metadata) of each finished video, like --print after_move:filepath"""
+    from yt_dlp.postprocessor import PostProcessor
+
+    manifest = []
+
+    class ManifestRecorder(PostProcessor):
+        def run(self, info):
+            # Path final setelah MoveFiles: hanya file yang benar-benar ditulis run ini
+            meta = self._downloader.sanitize_info(dict(info), remove_private_keys=True)
+            meta.pop("requested_downloads", None)
+            manifest.append((info["filepath"], meta))
+            return [], info
+
+    ydl.add_post_processor(ManifestRecorder(), when="after_move")
+    return manifest
+
+
+class MetadataStore:
+    """All tweet metadata in one append-only JSONL file, one line per video"""
+
+    def __init__(self, metadata_dir: str):
+        os.makedirs(metadata_dir, exist_ok=True)
+        self.path = os.path.join(metadata_dir, "tweets.jsonl")
+        self.lock = threading.Lock()
+
+    def append(self, tweet_url: str, videos: list):
+        lines = []
+        for path, meta in videos:
+            # Field hasil hitung ditulis terakhir agar tidak tertimpa metadata
+            record = {
+                **meta,
+                "tweet_url": tweet_url,
+                "filepath": path,
+                "filesize": os.path.getsize(path) if os.path.exists(path) else None,
+                "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        if not lines:
+            return
+        try:
+            with self.lock, open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        except OSError as e:
+            log(f"Failed to save metadata for {tweet_url}: {e}", "ERROR")
+
+
+def print_tweet_summary(result: dict, store: MetadataStore, use_cookies: bool):
+    lines = [
+        "\n📊 Download Summary:",
+        f"├─📌 Tweet URL        : {result['url']}",
+        f"├─🆔 Tweet ID         : {result['tweet_id']}",
+        f"├─🔐 Cookies Used     : {'Yes' if use_cookies else 'No'}",
+        f"├─⏱️ Saved Time       : {result['elapsed']:.2f} sec",
+        f"├─🔁 Rate-limit Waits : {result['retries']}",
+        f"├─📹 Videos Downloaded: {len(result['videos'])} file(s)",
+        f"├─📂 Metadata Store   : {store.path}",
+        f"└─📜 File List        :",
+    ]
+    for i, (path, meta) in enumerate(result["videos"], 1):
+        lines.append(f"   {i}. {os.path.basename(path)}")
+        width = meta.get("width") or "?"
+        height = meta.get("height") or "?"
+        resolution = f"{width}x{height}" if width and height else "?"
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        duration = meta.get("duration") or "?"
+        lines.append(f"      ├─🎞️ Resolution : {resolution}")
+        lines.append(f"      ├─💾 File Size  : {size_mb:.2f} MB")
+        lines.append(f"      └─⏱️ Duration   : {format_duration(duration)}")
+    if result["error"]:
+        lines.append(f"   ❌ {result['error']}")
+    print("\n".join(lines))
+
+
+def download_tweets(
+    tweet_urls: list,
+    video_dir: str,
+    cookies_path: str = "cookies.txt",
+    cache: InfoCache = None,
+    max_workers: int = 3,
+    max_retries: int = 5,
 ):
-    # 🆔 Extract Tweet ID - Biarkan print asli
-    match = re.search(r"/status/(\d+)", tweet_url)
-    if not match:
-        log("Invalid URL: Tweet ID not found.", "ERROR")
+    import yt_dlp
+
+    # 🆔 Extract Tweet ID
+    tweets = []
+    for url in tweet_urls:
+        match = re.search(r"/status/(\d+)", url)
+        if match:
+            tweets.append((url, match.group(1)))
+        else:
+            log(f"Invalid URL: Tweet ID not found: {url}", "ERROR")
+    if not tweets:
         raise ValueError("Invalid tweet URL")
-    tweet_id = match.group(1)
 
-    # 📁 Prepare directories - Tetap gunakan print
+    # 📁 Prepare directories
     os.makedirs(video_dir, exist_ok=True)
-    metadata_dir = os.path.join(video_dir, "metadata")
-    os.makedirs(metadata_dir, exist_ok=True)
+    store = MetadataStore(os.path.join(video_dir, "metadata"))
 
-    # 🍪 Check for cookies - Tetap gunakan print
+    # 🍪 Satu sesi cookie dipakai bersama oleh semua worker
     use_cookies = os.path.exists(cookies_path)
-    cookie_args = ["--cookies", cookies_path] if use_cookies else []
-
-    # 📥 Download video - Progress bar tetap pakai tqdm
-    log("Starting tweet video download...")
-    start_time = time.time()
-    output_template = os.path.join(video_dir, "%(id)s.%(ext)s")
-
-    command = (
-        [
-            "yt-dlp",
-            "-f",
-            "best",
-            "--write-info-json",
-            "-o",
-            output_template,
-        ]
-        + cookie_args
-        + [tweet_url]
-    )
-
-    # ▶️ Progress bar tetap sama
-    progress_bar = tqdm(total=100, desc="📥 Download", unit="%")
-    process = subprocess.Popen(
-        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
-    )
-
-    for line in process.stdout:
-        line = line.strip()
-        if "%" in line:
-            match = re.search(r"(\d{1,3}\.\d)%", line)
-            if match:
-                percent = float(match.group(1))
-                progress_bar.n = int(percent)
-                progress_bar.refresh()
-        elif "[download]" in line or "Destination" in line:
-            print(line)
-    process.wait()
-    progress_bar.n = 100
-    progress_bar.refresh()
-    progress_bar.close()
-
-    end_time = time.time()
-    elapsed = round(end_time - start_time, 2)
-    log("Download completed.")
-
-    video_exts = (".mp4", ".mkv", ".webm", ".mov", ".avi")
-    downloaded_files = [
-        os.path.join(video_dir, f)
-        for f in os.listdir(video_dir)
-        if f.lower().endswith(video_exts)
-    ]
-
-    for video_file in downloaded_files:
-        video_id = os.path.splitext(os.path.basename(video_file))[0]
-        info_file = os.path.join(video_dir, f"{video_id}.info.json")
-        if os.path.exists(info_file):
+    session = create_ydl(video_dir, cookies_path if use_cookies else None)
+    gate = RateLimitGate()
+    local = threading.local()
+    instances = []
+    instances_lock = threading.Lock()
+    print_lock = threading.Lock()
+
+    def worker_ydl():
+        # YoutubeDL tidak thread-safe: satu instance per worker, cookie jar bersama
+        if not hasattr(local, "ydl"):
+            local.ydl = create_ydl(video_dir, cookiejar=session.cookiejar)
+            local.manifest = attach_manifest(local.ydl)
+            with instances_lock:
+                instances.append(local.ydl)
+        return local.ydl
+
+    def fetch(tweet):
+        url, tweet_id = tweet
+        start = time.time()
+        result = {"url": url, "tweet_id": tweet_id, "videos": [], "retries": 0}
+        result["error"] = None
+        while True:
+            gate.wait()
             try:
-                with open(info_file, "r", encoding="utf-8") as f:
-                    meta = json.load(f)
-                meta_save_path = os.path.join(
-                    metadata_dir, f"tweet_meta_{video_id}.json"
-                )
-                with open(meta_save_path, "w", encoding="utf-8") as out:
-                    json.dump(meta, out, ensure_ascii=False, indent=2)
-                os.remove(info_file)
-                log(f"Metadata saved to: {meta_save_path}")
-            except Exception as e:
-                log(f"Failed to process metadata: {e}", "ERROR")
-        else:
-            log(f"Metadata not found for {video_file}", "ERROR")
-
-    # 📊 Summary - Tetap gunakan print asli
-    print("\n📊 Download Summary:")
-    print(f"├─📌 Tweet URL        : {tweet_url}")
-    print(f"├─🆔 Tweet ID         : {tweet_id}")
-    print(f"├─🔐 Cookies Used     : {'Yes' if use_cookies else 'No'}")
-    print(f"├─⏱️ Saved Time       : {elapsed:.2f} sec")
-    print(f"├─📹 Videos Downloaded: {len(downloaded_files)} file(s)")
-    print(f"├─📂 Metadata Folder  : {metadata_dir}")
-    print(f"└─📜 File List        :")
-
-    for i, f in enumerate(downloaded_files, 1):
-        fname = os.path.basename(f)
-        print(f"   {i}. {fname}")
-        video_id = os.path.splitext(fname)[0]
-        meta_path = os.path.join(metadata_dir, f"tweet_meta_{video_id}.json")
-        if os.path.exists(meta_path):
-            try:
-                with open(meta_path, "r", encoding="utf-8") as meta_file:
-                    meta = json.load(meta_file)
-                width = meta.get("width") or "?"
-                height = meta.get("height") or "?"
-                resolution = f"{width}x{height}" if width and height else "?"
-                size_mb = os.path.getsize(f) / (1024 * 1024)
-                duration = meta.get("duration") or "?"
-                formated_duration = format_duration(duration)
-                print(f"      ├─🎞️ Resolution : {resolution}")
-                print(f"      ├─💾 File Size  : {size_mb:.2f} MB")
-                print(f"      └─⏱️ Duration   : {formated_duration}")
-            except Exception as e:
-                print(f"      └─⚠️ Failed to read metadata: {e}")
-        else:
-            print(f"      └─⚠️ Metadata not found.")
+                extract_with_cache(worker_ydl(), cache, url)
+                gate.success()
+                break
+            except yt_dlp.utils.DownloadError as e:
+                server_wait = rate_limit_wait(e)
+                if server_wait is None or result["retries"] >= max_retries:
+                    if cache:
+                        cache.invalidate(url)
+                    result["error"] = str(e)
+                    break
+                result["retries"] += 1
+                gate.trip(server_wait)
+        result["elapsed"] = time.time() - start
+        # Worker memproses satu tweet sekaligus: isi manifest milik tweet ini
+        result["videos"] = list(dict(local.manifest).items())
+        local.manifest.clear()
+        store.append(url, result["videos"])
+        with print_lock:
+            print_tweet_summary(result, store, use_cookies)
+            progress_bar.update(1)
+        return result
+
+    log(f"Starting download of {len(tweets)} tweet(s) with {max_workers} worker(s)...")
+    start_time = time.time()
+    progress_bar = tqdm(total=len(tweets), desc="📥 Tweets", unit="tweet")
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(fetch, tweets))
+    finally:
+        progress_bar.close()
+        for ydl in instances:
+            ydl.close()
+        # Simpan cookie sesi (termasuk yang diperbarui server) sekali saja
+        session.close()
+
+    ok = [r for r in results if not r["error"]]
+    total_videos = sum(len(r["videos"]) for r in results)
+    print(f"\n🧾 Batch: {len(ok)}/{len(results)} tweet(s) OK")
+    print(f"├─📹 Videos     : {total_videos} file(s)")
+    print(f"├─🔁 Rate limits: {sum(r['retries'] for r in results)} wait(s)")
+    print(f"└─⏱️ Total Time : {time.time() - start_time:.2f} sec")
+    return results
+
+
+def load_tweet_urls(tweet_url: str, list_file: str) -> list:
+    urls = tweet_url.split()
+    if list_file and os.path.exists(list_file):
+        with open(list_file, "r", encoding="utf-8") as f:
+            urls += [
+                line.strip()
+                for line in f
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+    # Urutan dipertahankan, duplikat (x.com vs twitter.com) dibuang
+    unique = {}
+    for url in urls:
+        unique.setdefault(normalize_url(url), url)
+    return list(unique.values())
 
 
 install_dependencies()
-download_tweet_video(tweet_url, video_dir)
+info_cache = InfoCache(info_cache_dir, info_cache_ttl_min)
+try:
+    download_tweets(
+        load_tweet_urls(tweet_url, tweet_list_file),
+        video_dir,
+        cache=info_cache,
+        max_workers=max_parallel_tweets,
+        max_retries=max_rate_limit_retries,
+    )
+finally:
+    info_cache.save_stats()
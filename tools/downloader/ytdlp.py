@@ -3,15 +3,20 @@
 # ==========================
 # 📦 INSTALL DEPENDENCIES
 # ==========================
+import hashlib
+import json
 import logging
 import os
 import subprocess
 import time
 from datetime import datetime
-from urllib.parse import urlparse
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 import re
 import requests
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from IPython.display import Pretty, display
 
 
 def log(message, level="INFO"):
@@ -50,6 +55,22 @@ download_url = ""  # @param {type:"string"}
 filename = ""  # @param {type:"string"}
 output_dir = "/content/downloads"  # @param {type:"string"}
 retry_count = 3  # @param {type:"integer", min:1, max:10}
+engine = "python"  # @param ["python", "cli"]
+concurrent_fragments = 8  # @param {type:"integer", min:1, max:32}
+# @markdown Playlist / channel mode (in-process engine only)
+# @markdown - `playlist_index` is the position inside its own playlist or tab; channel tabs list newest first, so use `%(id)s` alone for stable names there
+playlist_mode = False  # @param {type:"boolean"}
+output_template = "%(playlist_title|Videos)s/%(playlist_index&{:03d} - |)s%(title).150B [%(id)s].%(ext)s"  # @param {type:"string"}
+download_archive = (
+    "/content/media_toolkit/config/ytdlp_archive.txt"  # @param {type:"string"}
+)
+max_parallel_items = 3  # @param {type:"integer", min:1, max:8}
+max_items = 0  # @param {type:"integer", min:0}
+# @markdown Extracted info cache (shared with twitter.py / multiple_source.py)
+info_cache_dir = "/content/media_toolkit/cache/ytdlp_info"  # @param {type:"string"}
+info_cache_ttl_min = 120  # @param {type:"integer", min:0}
+# @markdown Size budget per video in MB (0 = best quality, no limit)
+max_filesize_mb = 0  # @param {type:"number", min:0}
 
 
 # ==========================
@@ -132,7 +153,41 @@ def format_speed(speed_bytes):
 # ==========================
 # 🚀 MAIN DOWNLOAD FUNCTION
 # ==========================
-def download_file(download_url: str, filename: str, output_dir: str, retry_count: int):
+def run_ytdlp_cli(cmd: list) -> tuple:
+    """Run yt-dlp, echo its [download] lines and return (returncode, stderr)"""
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        universal_newlines=True,
+    )
+
+    # Process output in real-time
+    while True:
+        output = process.stdout.readline()
+        if output == "" and process.poll() is not None:
+            break
+        if output:
+            # Clean and display the progress
+            output = output.strip()
+            if "[download]" in output:
+                # Extract progress information
+                progress_info = output.split("[download]")[-1].strip()
+                log(f"{progress_info}", "DOWNLOAD")
+    return process.returncode, process.stderr.read()
+
+
+def download_file(
+    download_url: str,
+    filename: str,
+    output_dir: str,
+    retry_count: int,
+    concurrent_fragments: int = 1,
+    cache: "InfoCache" = None,
+    size_budget: int = 0,
+):
     os.makedirs(output_dir, exist_ok=True)
     final_filename = get_output_filename(download_url, filename)
     output_path = os.path.join(output_dir, final_filename)
@@ -148,36 +203,40 @@ def download_file(download_url: str, filename: str, output_dir: str, retry_count
             "--newline",  # Force progress in new lines
             "--retries",
             str(retry_count),
+            "--concurrent-fragments",
+            str(concurrent_fragments),
             "-o",
             output_path,
-            download_url,
         ]
-
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True,
-        )
-
-        # Process output in real-time
-        while True:
-            output = process.stdout.readline()
-            if output == "" and process.poll() is not None:
-                break
-            if output:
-                # Clean and display the progress
-                output = output.strip()
-                if "[download]" in output:
-                    # Extract progress information
-                    progress_info = output.split("[download]")[-1].strip()
-                    log(f"{progress_info}", flush=True)
+        source_args, from_cache = cached_info_args(cache, download_url)
+        if size_budget:
+            if from_cache:
+                with open(source_args[-1], "r", encoding="utf-8") as f:
+                    info = json.load(f)
+            else:
+                info = fetch_info_json(download_url)
+                # Info sudah diekstrak untuk budget: simpan dan pakai ulang
+                if info and cache and cache.enabled:
+                    cache.put(download_url, info)
+                    source_args = [
+                        "--no-clean-info-json",
+                        "--load-info-json",
+                        cache.path(download_url),
+                    ]
+                    from_cache = True
+            spec = budget_format_spec(info, size_budget)
+            if spec:
+                cmd += ["-f", spec]
+
+        returncode, error_output = run_ytdlp_cli(cmd + source_args)
+        if returncode != 0 and cache:
+            cache.invalidate(download_url)
+            if from_cache:
+                log("Cached info failed, retrying without the cache", "WARNING")
+                returncode, error_output = run_ytdlp_cli(cmd + [download_url])
 
         # Check for errors
-        if process.returncode != 0:
-            error_output = process.stderr.read()
+        if returncode != 0:
             log(f"yt-dlp failed: {error_output}", "ERROR")
             raise RuntimeError("Download process failed")
 
@@ -197,7 +256,691 @@ def download_file(download_url: str, filename: str, output_dir: str, retry_count
         raise
 
 
+# ==========================
+# 🐍 IN-PROCESS ENGINE
+# ==========================
+class ProgressLine:
+    """Single progress line updated in place instead of one log line per update"""
+
+    def __init__(self):
+        self.handle = None
+
+    def render(self, text: str):
+        if self.handle is None:
+            self.handle = display(Pretty(text), display_id=True)
+        else:
+            self.handle.update(Pretty(text))
+
+
+def make_progress_hook(progress: ProgressLine):
+    def hook(status: dict):
+        if status.get("status") == "downloading":
+            done = status.get("downloaded_bytes") or 0
+            total = status.get("total_bytes") or status.get("total_bytes_estimate")
+            speed = status.get("speed") or 0
+            eta = status.get("eta")
+            percent = f"{done * 100 / total:.1f}%" if total else "?%"
+            fragments = ""
+            if status.get("fragment_count"):
+                fragments = (
+                    f" | 🧩 {status.get('fragment_index', 0)}"
+                    f"/{status['fragment_count']}"
+                )
+            progress.render(
+                f"📥 {percent} of {format_size(total) if total else '?'}"
+                f" | ⚡ {format_speed(speed)} | ⏳ {eta if eta is not None else '?'}s"
+                f"{fragments}"
+            )
+        elif status.get("status") == "finished":
+            progress.render(
+                f"✅ Downloaded {os.path.basename(status.get('filename', ''))}"
+                f" ({format_size(status.get('total_bytes') or 0)})"
+            )
+
+    return hook
+
+
+def format_size(num_bytes: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if num_bytes < 1024:
+            return f"{num_bytes:.2f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.2f} TB"
+
+
+def create_ydl(
+    retry_count: int,
+    concurrent_fragments: int,
+    progress: ProgressLine,
+    extra_options: dict = None,
+    size_budget: int = 0,
+):
+    """One YoutubeDL instance reused for every URL in this run"""
+    import yt_dlp
+
+    options = {
+        "nopart": True,
+        "retries": retry_count,
+        "fragment_retries": retry_count,
+        "concurrent_fragment_downloads": concurrent_fragments,
+        "progress_hooks": [make_progress_hook(progress)],
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        **(extra_options or {}),
+    }
+    ydl = yt_dlp.YoutubeDL(options)
+    if size_budget:
+        apply_size_budget(ydl, size_budget)
+    return ydl
+
+
+def download_file_inprocess(
+    ydl,
+    download_url: str,
+    filename: str,
+    output_dir: str,
+    retry_count: int,
+    cache: "InfoCache" = None,
+):
+    os.makedirs(output_dir, exist_ok=True)
+    final_filename = get_output_filename(download_url, filename)
+    output_path = os.path.join(output_dir, final_filename)
+
+    print_download_summary(download_url, final_filename, output_path, retry_count)
+
+    try:
+        start_time = time.time()
+        ydl.params["outtmpl"] = {"default": output_path}
+        if cache:
+            info = extract_with_cache(ydl, cache, download_url)
+        else:
+            info = ydl.extract_info(download_url, download=True)
+        requested = (info or {}).get("requested_downloads") or [{}]
+        output_path = requested[0].get("filepath") or output_path
+        final_filename = os.path.basename(output_path)
+
+        elapsed = time.time() - start_time
+        print()  # New line after progress display
+        print_download_result(final_filename, download_url, output_path, elapsed)
+
+        if not verify_downloaded_file(output_path):
+            raise RuntimeError("Downloaded file verification failed")
+
+        return output_path
+
+    except Exception as e:
+        log(f"Download failed: {str(e)}", "ERROR")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+
+
+def download_files_inprocess(
+    urls: list,
+    filename: str,
+    output_dir: str,
+    retry_count: int,
+    concurrent_fragments: int,
+    cache: "InfoCache" = None,
+    size_budget: int = 0,
+):
+    progress = ProgressLine()
+    results = []
+    with create_ydl(
+        retry_count, concurrent_fragments, progress, size_budget=size_budget
+    ) as ydl:
+        for url in urls:
+            # Nama file manual hanya berlaku untuk satu URL
+            name = filename if len(urls) == 1 else ""
+            try:
+                results.append(
+                    download_file_inprocess(
+                        ydl, url, name, output_dir, retry_count, cache
+                    )
+                )
+            except Exception:
+                if len(urls) == 1:
+                    raise
+    return results
+
+
+# ==========================
+# 🗄️ INFO CACHE
+# ==========================
+# Blok ini juga disalin ke twitter.py dan multiple_source.py (cell mandiri):
+# perubahan harus disamakan di ketiga file
+TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "si", "feature", "ref", "ref_src", "s"}
+HOST_ALIASES = {"x.com": "twitter.com"}
+# Hanya situs ini yang dinormalisasi; URL lain (direct, m3u8, signed) jadi key utuh
+NORMALIZED_HOSTS = {"youtube.com", "youtu.be", "music.youtube.com", "twitter.com"}
+
+
+def normalize_url(url: str) -> str:
+    """Cache key form of a URL: known video sites drop share/tracking params"""
+    url = url.strip()
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+            break
+    host = HOST_ALIASES.get(host, host)
+    if host not in NORMALIZED_HOSTS:
+        return url
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith("utm_")
+    )
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse(("https", host, path, "", urlencode(query), ""))
+
+
+class InfoCache:
+    """On-disk cache of yt-dlp info dicts, one <sha1>.info.json per normalized URL"""
+
+    def __init__(self, cache_dir: str, ttl_minutes: int):
+        self.cache_dir = cache_dir
+        self.ttl = ttl_minutes * 60
+        self.enabled = bool(cache_dir) and ttl_minutes > 0
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0}
+        self.lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, url: str) -> str:
+        key = hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.info.json")
+
+    def count(self, field: str):
+        with self.lock:
+            self.stats[field] += 1
+
+    def get(self, url: str):
+        if not self.enabled:
+            return None
+        path = self.path(url)
+        if not os.path.exists(path):
+            self.count("misses")
+            return None
+        if time.time() - os.path.getmtime(path) > self.ttl:
+            self.count("expired")
+            self.count("misses")
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            self.count("misses")
+            return None
+        self.count("hits")
+        return info
+
+    def put(self, url: str, info: dict):
+        if not self.enabled or not info:
+            return
+        path = self.path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(info, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, url: str):
+        if self.enabled and os.path.exists(self.path(url)):
+            os.remove(self.path(url))
+            self.count("invalidated")
+
+    def save_stats(self):
+        """Accumulate this run's counters into stats.json next to the cache"""
+        if not self.enabled:
+            return
+        stats_path = os.path.join(self.cache_dir, "stats.json")
+        totals = {}
+        if os.path.exists(stats_path):
+            try:
+                with open(stats_path, "r", encoding="utf-8") as f:
+                    totals = json.load(f)
+            except (OSError, ValueError):
+                totals = {}
+        for field, value in self.stats.items():
+            totals[field] = totals.get(field, 0) + value
+        with open(stats_path, "w", encoding="utf-8") as f:
+            json.dump(totals, f, indent=2)
+        self.print_summary(totals)
+
+    def print_summary(self, totals: dict):
+        def rate(stats):
+            lookups = stats.get("hits", 0) + stats.get("misses", 0)
+            return f"{stats.get('hits', 0) * 100 / lookups:.1f}%" if lookups else "-"
+
+        print(
+            f"🗄️ Info cache: {self.stats['hits']} hit(s), {self.stats['misses']} miss(es)"
+            f" ({self.stats['expired']} expired) | hit rate {rate(self.stats)}"
+            f" | all-time {rate(totals)}"
+        )
+
+
+def extract_with_cache(
+    ydl, cache: InfoCache, url: str, ie_key: str = None, extra_info: dict = None
+):
+    """Download url, reusing a cached info dict instead of re-extracting the page"""
+    import yt_dlp
+
+    cached = cache.get(url)
+    if cached is not None:
+        try:
+            return ydl.process_ie_result(cached, download=True, extra_info=extra_info)
+        except yt_dlp.utils.DownloadError as e:
+            # URL format biasanya sudah kedaluwarsa: ekstrak ulang dari halaman
+            log(f"Cached info failed ({e}), extracting again", "WARNING")
+            cache.invalidate(url)
+
+    info = ydl.extract_info(
+        url, download=False, ie_key=ie_key, extra_info=extra_info, process=False
+    )
+    # Hanya video tunggal: entri playlist mentah masih berupa generator
+    if info and info.get("_type", "video") == "video":
+        cache.put(url, ydl.sanitize_info(dict(info)))
+    return ydl.process_ie_result(info, download=True, extra_info=extra_info)
+
+
+def fetch_info_json(url: str, extra_args: list = None):
+    result = subprocess.run(
+        ["yt-dlp", "-J", "--no-warnings"] + (extra_args or []) + [url],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return None
+
+
+def cached_info_args(cache: InfoCache, url: str) -> tuple:
+    """(yt-dlp CLI source arguments, loaded from cache) for url"""
+    if not cache or not cache.enabled:
+        return [url], False
+    if cache.get(url) is not None:
+        return ["--no-clean-info-json", "--load-info-json", cache.path(url)], True
+    # Miss: proses download ini sendiri menulis info JSON ke cache, tanpa yt-dlp -J
+    info_template = cache.path(url)[: -len(".info.json")]
+    return [
+        "--write-info-json",
+        "--no-write-playlist-metafiles",
+        "-o",
+        f"infojson:{info_template}",
+        url,
+    ], False
+
+
+# ==========================
+# 🎚️ SIZE BUDGET
+# ==========================
+def estimate_format_size(fmt: dict, duration: float):
+    """filesize, then filesize_approx, then bitrate x duration (tbr is in kbit/s)"""
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    if size:
+        return size
+    bitrate = fmt.get("tbr") or (fmt.get("vbr") or 0) + (fmt.get("abr") or 0)
+    if bitrate and duration:
+        return int(bitrate * 1000 / 8 * duration)
+    return None
+
+
+def format_quality(fmt: dict) -> tuple:
+    return (fmt.get("height") or 0, fmt.get("fps") or 0, fmt.get("tbr") or 0)
+
+
+def budget_candidates(formats: list, duration: float) -> list:
+    """(quality, size, [formats]) for every muxed format and video+audio pair"""
+    videos, audios, candidates = [], [], []
+    for fmt in formats:
+        has_video = fmt.get("vcodec") not in (None, "none")
+        has_audio = fmt.get("acodec") not in (None, "none")
+        size = estimate_format_size(fmt, duration)
+        if has_video and not has_audio:
+            videos.append((fmt, size))
+        elif has_audio and not has_video:
+            audios.append((fmt, size))
+        elif fmt.get("vcodec") != "none" or has_audio:
+            # Direct link / generic: codec tidak diketahui, anggap format siap pakai
+            candidates.append((format_quality(fmt) + (0,), size, [fmt]))
+    for video, video_size in videos:
+        for audio, audio_size in audios:
+            size = video_size + audio_size if video_size and audio_size else None
+            quality = format_quality(video) + (audio.get("abr") or 0,)
+            candidates.append((quality, size, [video, audio]))
+    return candidates
+
+
+def merged_format(selected: list) -> dict:
+    from yt_dlp.utils import get_compatible_ext
+
+    if len(selected) == 1:
+        return selected[0]
+    video, audio = selected
+    return {
+        "format_id": f"{video['format_id']}+{audio['format_id']}",
+        # Container yang sama dengan pilihan yt-dlp (mis. vp9 webm + m4a -> mkv)
+        "ext": get_compatible_ext(
+            vcodecs=[video.get("vcodec")],
+            acodecs=[audio.get("acodec")],
+            vexts=[video.get("ext")],
+            aexts=[audio.get("ext")],
+        ),
+        "requested_formats": selected,
+        "protocol": f"{video.get('protocol')}+{audio.get('protocol')}",
+    }
+
+
+def pick_budget_format(formats: list, duration: float, budget_bytes: int):
+    """Highest-quality format (or pair) whose estimated size fits the budget"""
+    candidates = budget_candidates(formats, duration)
+    if not candidates:
+        return None, None
+    fitting = [c for c in candidates if c[1] is not None and c[1] <= budget_bytes]
+    if fitting:
+        quality, size, selected = max(fitting, key=lambda c: (c[0], c[1]))
+    else:
+        sized = [c for c in candidates if c[1] is not None]
+        if not sized:
+            log("No size information for any format, using best quality", "WARNING")
+            return None, None
+        quality, size, selected = min(sized, key=lambda c: c[1])
+        log(
+            f"No format fits {format_size(budget_bytes)},"
+            f" using the smallest (~{format_size(size)})",
+            "WARNING",
+        )
+    return selected, size
+
+
+def apply_size_budget(ydl, budget_bytes: int):
+    """Route format selection of ydl through the size budget"""
+    from yt_dlp.postprocessor import PostProcessor
+
+    # Selector hanya menerima daftar format; durasi diambil sebelum seleksi
+    current = {}
+
+    class DurationProbe(PostProcessor):
+        def run(self, info):
+            current["duration"] = info.get("duration")
+            return [], info
+
+    ydl.add_post_processor(DurationProbe(), when="pre_process")
+    ydl.format_selector = make_budget_selector(
+        budget_bytes, current, ydl.build_format_selector("bv*+ba/b")
+    )
+
+
+def make_budget_selector(budget_bytes: int, current: dict, default_selector):
+    def selector(ctx: dict):
+        formats = ctx.get("formats") or []
+        selected, size = pick_budget_format(
+            formats, current.get("duration"), budget_bytes
+        )
+        if selected is None:
+            # Tanpa info ukuran: serahkan ke selector default yt-dlp (bv*+ba/b)
+            yield from default_selector(ctx)
+            return
+        chosen = merged_format(selected)
+        log(
+            f"Budget {format_size(budget_bytes)}: format {chosen['format_id']}"
+            f" ({selected[0].get('height') or '?'}p, ~{format_size(size)})"
+        )
+        yield chosen
+
+    return selector
+
+
+def budget_format_spec(info: dict, budget_bytes: int):
+    """Same choice as make_budget_selector, as a -f spec for the CLI engine"""
+    if not info or info.get("_type", "video") != "video":
+        return None
+    selected, size = pick_budget_format(
+        info.get("formats") or [info], info.get("duration"), budget_bytes
+    )
+    if selected is None:
+        return None
+    spec = "+".join(fmt["format_id"] for fmt in selected)
+    log(f"Budget {format_size(budget_bytes)}: format {spec} (~{format_size(size)})")
+    return spec
+
+
+# ==========================
+# 📚 PLAYLIST / CHANNEL QUEUE
+# ==========================
+class PlaylistProgress:
+    """Aggregate progress of concurrently downloading items into one line"""
+
+    def __init__(self, total_items: int):
+        self.total_items = total_items
+        self.items = {}
+        self.finished = 0
+        self.lock = threading.Lock()
+        self.line = ProgressLine()
+
+    def hook(self, status: dict):
+        key = status.get("info_dict", {}).get("id") or status.get("filename")
+        with self.lock:
+            if status.get("status") == "downloading":
+                self.items[key] = status.get("speed") or 0
+            elif status.get("status") == "finished":
+                self.items.pop(key, None)
+            speed = sum(self.items.values())
+            self.line.render(
+                f"🗂️ Active {len(self.items)} | Done {self.finished}/{self.total_items}"
+                f" | ⚡ {format_speed(speed)}"
+            )
+
+    def item_done(self):
+        with self.lock:
+            self.finished += 1
+
+
+def load_archive_ids(archive_path: str) -> set:
+    if not archive_path or not os.path.exists(archive_path):
+        return set()
+    with open(archive_path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def flatten_entries(info: dict, playlist: dict = None, position: int = None) -> list:
+    """Expand nested playlists (channel tabs, seasons) into (entry, playlist, position)"""
+    if info.get("_type") not in ("playlist", "multi_video"):
+        return [(info, playlist or {}, position)]
+    items = []
+    # Posisi dihitung per playlist asal, bukan urutan global hasil flatten
+    for index, entry in enumerate(info.get("entries") or [], 1):
+        if entry:
+            items.extend(flatten_entries(entry, info, index))
+    return items
+
+
+def list_playlist_items(url: str) -> tuple:
+    import yt_dlp
+
+    log("Listing playlist entries...")
+    with yt_dlp.YoutubeDL(
+        {"extract_flat": "in_playlist", "quiet": True, "no_warnings": True}
+    ) as ydl:
+        info = ydl.extract_info(url, download=False)
+    return info, flatten_entries(info)
+
+
+def archive_key(entry: dict) -> str:
+    # Format sama dengan yang ditulis yt-dlp ke download archive
+    # Entri tanpa id/extractor baru bisa dicek yt-dlp saat extract penuh
+    extractor = entry.get("ie_key") or entry.get("extractor_key")
+    if not extractor or not entry.get("id"):
+        return None
+    return f"{extractor.lower()} {entry['id']}"
+
+
+def download_playlist_inprocess(
+    playlist_url: str,
+    output_dir: str,
+    output_template: str,
+    archive_path: str,
+    max_parallel_items: int,
+    retry_count: int,
+    concurrent_fragments: int,
+    max_items: int = 0,
+    cache: InfoCache = None,
+    size_budget: int = 0,
+):
+    os.makedirs(output_dir, exist_ok=True)
+    if archive_path:
+        os.makedirs(os.path.dirname(archive_path) or ".", exist_ok=True)
+
+    info, items = list_playlist_items(playlist_url)
+    archived = load_archive_ids(archive_path)
+    queue = []
+    for index, (entry, playlist, position) in enumerate(items, 1):
+        key = archive_key(entry)
+        if key and key in archived:
+            continue
+        queue.append((index, entry, playlist, position))
+    if max_items:
+        queue = queue[:max_items]
+
+    print(f"╭📚 Playlist   : {info.get('title') or playlist_url}")
+    print(f"├🧾 Entries    : {len(items)}")
+    print(f"├🗃️ Archived   : {len(items) - len(queue)} already downloaded")
+    print(f"├📥 To fetch   : {len(queue)}")
+    print(f"╰🧵 Parallel   : {max_parallel_items}\n")
+    if not queue:
+        log("Nothing new to download")
+        return []
+
+    progress = PlaylistProgress(len(queue))
+    local = threading.local()
+    instances = []
+    instances_lock = threading.Lock()
+    options = {
+        "outtmpl": {"default": os.path.join(output_dir, output_template)},
+        "download_archive": archive_path or None,
+        "progress_hooks": [progress.hook],
+    }
+
+    def worker_ydl():
+        # YoutubeDL tidak thread-safe: satu instance per worker, dipakai ulang
+        if not hasattr(local, "ydl"):
+            local.ydl = create_ydl(
+                retry_count, concurrent_fragments, None, options, size_budget
+            )
+            with instances_lock:
+                instances.append(local.ydl)
+        return local.ydl
+
+    def fetch(item):
+        index, entry, playlist, position = item
+        url = entry.get("webpage_url") or entry.get("url")
+        extra_info = {
+            "playlist_index": position or index,
+            "playlist_title": playlist.get("title"),
+            "playlist_id": playlist.get("id"),
+            "playlist": playlist.get("title"),
+        }
+        start = time.time()
+        try:
+            if cache:
+                result = extract_with_cache(
+                    worker_ydl(), cache, url, entry.get("ie_key"), extra_info
+                )
+            else:
+                result = worker_ydl().extract_info(
+                    url,
+                    download=True,
+                    ie_key=entry.get("ie_key"),
+                    extra_info=extra_info,
+                )
+            requested = (result or {}).get("requested_downloads") or [{}]
+            path = requested[0].get("filepath")
+            size = os.path.getsize(path) if path and os.path.exists(path) else 0
+            status = "ok" if path else "skipped"
+        except Exception as e:
+            log(f"#{index} {entry.get('title') or url}: {e}", "ERROR")
+            path, size, status = None, 0, "failed"
+        progress.item_done()
+        return {
+            "index": index,
+            "title": entry.get("title") or url,
+            "path": path,
+            "size": size,
+            "elapsed": time.time() - start,
+            "status": status,
+        }
+
+    start_time = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=max_parallel_items) as pool:
+            results = list(pool.map(fetch, queue))
+    finally:
+        for ydl in instances:
+            ydl.close()
+
+    print_playlist_summary(results, time.time() - start_time)
+    return results
+
+
+def print_playlist_summary(results: list, elapsed: float):
+    ok = [r for r in results if r["status"] == "ok"]
+    total_size = sum(r["size"] for r in ok)
+    print(f"\n📊 Playlist Summary: {len(ok)}/{len(results)} downloaded")
+    for r in results:
+        icon = {"ok": "✅", "skipped": "⏭️", "failed": "❌"}[r["status"]]
+        print(
+            f"   {icon} #{r['index']:<4} {format_size(r['size']):>11}"
+            f" {r['elapsed']:>7.1f}s  {r['title'][:80]}"
+        )
+    print(f"╰📦 Total {format_size(total_size)} in {elapsed:.1f}s")
+
+
 # ==========================
 # ✅ EXECUTE DOWNLOAD
 # ==========================
-download_file(download_url, filename, output_dir, retry_count)
+download_urls = download_url.split()
+info_cache = InfoCache(info_cache_dir, info_cache_ttl_min)
+size_budget = int(max_filesize_mb * 1024 * 1024)
+try:
+    if playlist_mode:
+        for url in download_urls:
+            download_playlist_inprocess(
+                url,
+                output_dir,
+                output_template,
+                download_archive,
+                max_parallel_items,
+                retry_count,
+                concurrent_fragments,
+                max_items,
+                info_cache,
+                size_budget,
+            )
+    elif engine == "python":
+        download_files_inprocess(
+            download_urls,
+            filename,
+            output_dir,
+            retry_count,
+            concurrent_fragments,
+            info_cache,
+            size_budget,
+        )
+    else:
+        for url in download_urls:
+            download_file(
+                url,
+                filename if len(download_urls) == 1 else "",
+                output_dir,
+                retry_count,
+                concurrent_fragments,
+                info_cache,
+                size_budget,
+            )
+finally:
+    info_cache.save_stats()